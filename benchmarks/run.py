@@ -0,0 +1,286 @@
+"""
+Benchmarks for the conversion and splitting hot paths.
+
+Usage:
+    python benchmarks/run.py --output bench.json
+    python benchmarks/run.py --baseline bench.json --time-threshold 0.2 --memory-threshold 0.2
+
+Every case runs on a synthetic document, so OCR and layout models are not involved.
+The process_document case serves the conversion from the conversion cache and
+measures everything after docling: image export, chapter splitting, markdown export
+and disk writes. The import cases time a cold import in a fresh interpreter: app_import
+is what the first page load waits for, pipeline_import what the engine warm-up loads.
+"""
+
+from pathlib import Path
+from typing import Callable, List, Optional
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parent
+SRC = ROOT.parent / "src"
+sys.path.insert(0, str(SRC))
+sys.path.insert(0, str(ROOT))
+
+from synthetic import make_document  # noqa: E402
+
+PIPELINE_SETTINGS = {
+    "do_ocr": False,
+    "do_table_structure": False,
+    "ocr_lang": "en",
+    "accelerator_device": "CPU",
+    "shard_pages": 0,
+    "enable_chapters": True,
+    "heading_level": 1,
+    "min_words": 500,
+    "max_words": 8000,
+}
+
+
+def measure(setup: Callable, run: Callable, repeat: int) -> dict:
+    """Time run(setup()) repeat times, then measure its peak traced memory once."""
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+
+    # tracemalloc slows allocation down, so memory is measured in a separate run
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "peak_memory_bytes": peak,
+    }
+
+
+# Prints the import time and the peak traced memory of one module import as JSON
+IMPORT_SCRIPT = """
+import json, sys, time, tracemalloc
+if sys.argv[2] == "1":
+    tracemalloc.start()
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+print(json.dumps({"seconds": seconds, "peak_memory_bytes": peak}))
+"""
+
+
+def measure_import(module: str, workdir: Path, repeat: int) -> dict:
+    """Time a cold import of module in fresh interpreters, then measure its memory once."""
+
+    def run(trace: bool) -> dict:
+        completed = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT, module, "1" if trace else "0"],
+            cwd=workdir,
+            env={**os.environ, "PYTHONPATH": str(SRC)},
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.splitlines()[-1])
+
+    timings = [run(trace=False)["seconds"] for _ in range(repeat)]
+    return {
+        "seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "peak_memory_bytes": run(trace=True)["peak_memory_bytes"],
+    }
+
+
+def bench_split_document(args: argparse.Namespace, workdir: Path) -> dict:
+    from chapter_splitter import ChapterSplitter
+
+    doc = make_document(args.pages, args.heading_depth, args.words_per_section, images=0)
+    splitter = ChapterSplitter(workdir / "split")
+    return measure(
+        lambda: doc,
+        lambda d: splitter.split_document(
+            d,
+            PIPELINE_SETTINGS["heading_level"],
+            PIPELINE_SETTINGS["min_words"],
+            PIPELINE_SETTINGS["max_words"],
+        ),
+        args.repeat,
+    )
+
+
+def bench_update_image_links(args: argparse.Namespace, workdir: Path) -> dict:
+    from processor import DocumentProcessor
+
+    image_dir = workdir / "source_images"
+    processor = DocumentProcessor(workdir / "images_out")
+
+    # update_image_links rewrites picture paths, so every run gets a fresh document
+    return measure(
+        lambda: make_document(
+            args.pages,
+            args.heading_depth,
+            words_per_section=0,
+            images=args.images,
+            unique_images=args.unique_images,
+            image_dir=image_dir,
+        ),
+        processor.update_image_links,
+        args.repeat,
+    )
+
+
+def bench_export_to_markdown(args: argparse.Namespace, workdir: Path) -> dict:
+    doc = make_document(args.pages, args.heading_depth, args.words_per_section, images=0)
+    return measure(lambda: doc, lambda d: d.export_to_markdown(), args.repeat)
+
+
+def bench_process_document(args: argparse.Namespace, workdir: Path) -> dict:
+    from pipeline import process_document, setup_directories
+    from conversion_cache import get_conversion_cache
+
+    # process_document works relative to the current directory (temp/, output/, cache/)
+    os.chdir(workdir)
+    source_path = workdir / "synthetic.pdf"
+    source_path.write_bytes(b"%PDF-1.7 synthetic benchmark input")
+
+    doc = make_document(args.pages, args.heading_depth, args.words_per_section, images=0)
+    cache = get_conversion_cache()
+    cache.put(cache.make_key(source_path, PIPELINE_SETTINGS), doc)
+
+    def run(output_dir: Path):
+        status, *_ = process_document(source_path, output_dir, PIPELINE_SETTINGS)
+        if status != "Success":
+            raise RuntimeError(status)
+
+    return measure(lambda: setup_directories("synthetic"), run, args.repeat)
+
+
+def bench_app_import(args: argparse.Namespace, workdir: Path) -> dict:
+    return measure_import("app", workdir, args.repeat)
+
+
+def bench_pipeline_import(args: argparse.Namespace, workdir: Path) -> dict:
+    return measure_import("pipeline", workdir, args.repeat)
+
+
+CASES = {
+    "split_document": bench_split_document,
+    "update_image_links": bench_update_image_links,
+    "export_to_markdown": bench_export_to_markdown,
+    "process_document": bench_process_document,
+    "app_import": bench_app_import,
+    "pipeline_import": bench_pipeline_import,
+}
+
+
+def compare(
+    results: dict, baseline: dict, time_threshold: float, memory_threshold: float
+) -> List[str]:
+    """Return a description of every case that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if result["seconds"] > base["seconds"] * (1 + time_threshold):
+            regressions.append(
+                f"{name}: {result['seconds']:.4f}s vs baseline {base['seconds']:.4f}s "
+                f"(+{result['seconds'] / base['seconds'] - 1:.0%})"
+            )
+        if result["peak_memory_bytes"] > base["peak_memory_bytes"] * (1 + memory_threshold):
+            regressions.append(
+                f"{name}: peak memory {result['peak_memory_bytes']:,} B vs baseline "
+                f"{base['peak_memory_bytes']:,} B "
+                f"(+{result['peak_memory_bytes'] / base['peak_memory_bytes'] - 1:.0%})"
+            )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--heading-depth", type=int, default=3)
+    parser.add_argument("--words-per-section", type=int, default=400)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--unique-images", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previous results file")
+    parser.add_argument(
+        "--time-threshold", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)"
+    )
+    parser.add_argument(
+        "--memory-threshold", type=float, default=0.2, help="Allowed peak memory growth"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    cwd = Path.cwd()
+    output = args.output.resolve() if args.output else None
+    baseline_path = args.baseline.resolve() if args.baseline else None
+
+    results = {}
+    for name in args.cases:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                result = CASES[name](args, Path(tmp))
+            finally:
+                os.chdir(cwd)
+        result["pages_per_second"] = args.pages / result["seconds"] if result["seconds"] else 0.0
+        results[name] = result
+        print(
+            f"{name:<20} {result['seconds'] * 1000:9.1f} ms  "
+            f"{result['pages_per_second']:10.1f} pages/s  "
+            f"{result['peak_memory_bytes'] / 1024 / 1024:8.1f} MiB peak"
+        )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "pages": args.pages,
+                "heading_depth": args.heading_depth,
+                "words_per_section": args.words_per_section,
+                "images": args.images,
+                "unique_images": args.unique_images,
+                "repeat": args.repeat,
+            },
+        },
+        "results": results,
+    }
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text())
+        if baseline.get("meta", {}).get("params") != report["meta"]["params"]:
+            print("Warning: baseline was recorded with different parameters")
+        regressions = compare(results, baseline, args.time_threshold, args.memory_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
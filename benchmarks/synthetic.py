@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Optional
+import random
+from docling_core.types.doc import (
+    BoundingBox,
+    DocItemLabel,
+    DoclingDocument,
+    ImageRef,
+    ProvenanceItem,
+    Size,
+)
+from PIL import Image
+
+VOCABULARY = (
+    "the of and to in is that for it as was with be by on not he this are or his from at "
+    "which but have an they you were her she there been one all we their has would when "
+    "theorem proof lemma function matrix vector energy cell protein market model system"
+).split()
+WORDS_PER_PARAGRAPH = 120
+PAGE_SIZE = Size(width=595, height=842)
+# Grayscale noise of this size encodes to a PNG of roughly 16KB
+IMAGE_SIZE = (128, 128)
+
+
+def _provenance(page_no: int) -> ProvenanceItem:
+    return ProvenanceItem(
+        page_no=page_no, bbox=BoundingBox(l=50, t=50, r=545, b=792), charspan=(0, 0)
+    )
+
+
+def make_document(
+    pages: int = 200,
+    heading_depth: int = 3,
+    words_per_section: int = 400,
+    sections_per_page: int = 2,
+    images: int = 50,
+    unique_images: int = 10,
+    image_dir: Optional[Path] = None,
+    seed: int = 0,
+) -> DoclingDocument:
+    """
+    Build a deterministic DoclingDocument for benchmarking.
+
+    Headings cycle through markdown levels 1..heading_depth so the document has a nested
+    heading tree. Pictures are spread evenly over the pages and show only unique_images
+    distinct images, so repeats exercise image deduplication. Their images are embedded
+    as data URIs the way docling generates them; when image_dir is given, the images are
+    written there as PNG files and referenced by path instead.
+    """
+    rnd = random.Random(seed)
+    doc = DoclingDocument(name="synthetic")
+
+    image_refs = []
+    if images:
+        if image_dir is not None:
+            image_dir.mkdir(parents=True, exist_ok=True)
+        for idx in range(max(1, unique_images)):
+            image = Image.frombytes("L", IMAGE_SIZE, rnd.randbytes(IMAGE_SIZE[0] * IMAGE_SIZE[1]))
+            if image_dir is None:
+                image_refs.append(ImageRef.from_pil(image, dpi=72))
+                continue
+            path = image_dir / f"source_{idx}.png"
+            image.save(path)
+            image_refs.append(
+                ImageRef(
+                    mimetype="image/png",
+                    dpi=72,
+                    size=Size(width=image.width, height=image.height),
+                    uri=path,
+                )
+            )
+
+    # Spread pictures evenly over the pages
+    pictures_per_page = [0] * (pages + 1)
+    for idx in range(images if pages else 0):
+        pictures_per_page[1 + (idx * pages) // images] += 1
+
+    section = 0
+    picture_idx = 0
+    for page_no in range(1, pages + 1):
+        doc.add_page(page_no=page_no, size=PAGE_SIZE)
+        prov = _provenance(page_no)
+
+        for _ in range(sections_per_page):
+            level = 1 + section % heading_depth
+            title = f"Section {section + 1}"
+            if level == 1:
+                doc.add_title(text=title, prov=prov)
+            else:
+                doc.add_heading(text=title, level=level - 1, prov=prov)
+            section += 1
+
+            remaining = words_per_section
+            while remaining > 0:
+                count = min(WORDS_PER_PARAGRAPH, remaining)
+                text = " ".join(rnd.choice(VOCABULARY) for _ in range(count))
+                doc.add_text(label=DocItemLabel.TEXT, text=text, prov=prov)
+                remaining -= count
+
+        for _ in range(pictures_per_page[page_no]):
+            # Every picture gets its own ImageRef, since exporting rewrites its URI
+            image = image_refs[picture_idx % len(image_refs)].model_copy()
+            doc.add_picture(image=image, prov=prov)
+            picture_idx += 1
+
+    return doc
@@ -1,116 +1,221 @@
 import streamlit as st
 from pathlib import Path
-import shutil
-import time
 import logging
+import time
+import uuid
 from logger import configure_logging
-from docling.document_converter import DocumentConverter, PdfFormatOption
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import (
-    PdfPipelineOptions,
-    AcceleratorDevice,
-    AcceleratorOptions,
+from chapter_browser import (
+    DocumentView,
+    document_label,
+    list_documents,
+    paginate,
+    split_images,
 )
-from processor import DocumentProcessor
-
-
-def setup_directories(doc_name: str) -> Path:
-    """Create output directory structure for a document."""
-    output_dir = Path("output") / doc_name
-    (output_dir / "images").mkdir(parents=True, exist_ok=True)
-    (output_dir / "chapters").mkdir(parents=True, exist_ok=True)
-    return output_dir
+from cpu_budget import get_cpu_budget
+from engine import get_engine
+from ingest import resolve_server_path, shared_roots, sweep_stale_job_dirs
+from instrumentation import StageTimer, format_span
+from jobs import FAILED, QUEUED, RUNNING, Job, QueueFullError, get_job_manager
+from search_index import get_search_index
+
+# docling and the conversion modules are imported by the engine warm-up thread, so the
+# page renders without waiting for them
+
+# Chapters kept split into pages across reruns and sessions
+CHAPTER_CACHE_SIZE = 16
+
+
+def run_job(source_path: Path, pipeline_settings: dict, timer: StageTimer) -> tuple:
+    """Process one queued document in a job worker thread with its share of the CPU."""
+    with timer.span("engine_wait"):
+        pipeline = get_engine().pipeline()
+    output_dir = pipeline.setup_directories(source_path.stem)
+    with get_cpu_budget().lease(source_path.name) as num_threads:
+        pipeline_settings = dict(pipeline_settings, num_threads=num_threads)
+        return pipeline.process_document(source_path, output_dir, pipeline_settings, timer)
+
+
+def format_statistics(job: Job) -> str:
+    """Render the processing statistics of a finished job."""
+    _, _, chapters, process_stats = job.result
+    cache_stats = get_engine().pipeline().get_conversion_cache().stats()
+    stats = [
+        f"Time taken: {job.elapsed:.2f} seconds",
+        f"CPU threads: {process_stats['num_threads']}",
+        f"Conversion cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses",
+    ]
+
+    image_stats = process_stats.get("images")
+    if image_stats and image_stats["images"]:
+        stats.append(
+            f"Images: {image_stats['images']} exported as "
+            f"{image_stats['unique_images']} files "
+            f"(dedup ratio {image_stats['dedup_ratio']:.1f}x, "
+            f"{image_stats['bytes_copied']:,} bytes copied)"
+        )
 
+    page_stats = process_stats.get("page_cache")
+    if page_stats:
+        stats.append(
+            f"Page cache: {page_stats['reused_pages']} of {page_stats['pages']} pages reused, "
+            f"{page_stats['converted_pages']} converted"
+        )
 
-def process_document(uploaded_file, output_dir: Path, pipeline_settings: dict):
-    """Process document and save results in the structured output directory."""
-    logger = logging.getLogger(__name__)
+    triage = process_stats.get("ocr_triage")
+    if triage:
+        stats.append(
+            f"OCR triage: {triage['text_pages']} pages with text layer, "
+            f"{triage['ocr_pages']} pages OCR'd ({triage['ocr_page_list'] or 'none'}), "
+            f"tables analyzed on {triage['table_pages']} pages"
+        )
 
-    # Save uploaded file temporarily
-    temp_path = Path("temp") / uploaded_file.name
-    temp_path.parent.mkdir(exist_ok=True)
-    logger.debug(f"Created temporary file at: {temp_path}")
-
-    with temp_path.open("wb") as f:
-        shutil.copyfileobj(uploaded_file, f)
-
-    try:
-        # Initialize processor
-        processor = DocumentProcessor(output_dir)
-        logger.debug(f"Initialized DocumentProcessor with output directory: {output_dir}")
-
-        # Configure document converter
-        logger.debug("Configuring document converter pipeline")
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = pipeline_settings["do_ocr"]
-        pipeline_options.do_table_structure = pipeline_settings["do_table_structure"]
-
-        # Set OCR languages if provided
-        if pipeline_settings["ocr_lang"]:
-            pipeline_options.ocr_options.lang = [
-                lang.strip() for lang in pipeline_settings["ocr_lang"].split(",")
+    if job.pipeline_settings["enable_chapters"] and chapters:
+        total_chapters = process_stats["chapters"]
+        total_words = process_stats["chapter_words"]
+        stats.extend(
+            [
+                f"Total chapters: {total_chapters}",
+                f"Total words: {total_words:,}",
+                f"Average words per chapter: {total_words / total_chapters:,.0f}",
             ]
-
-        # Configure accelerator
-        device = getattr(AcceleratorDevice, pipeline_settings["accelerator_device"])
-        pipeline_options.accelerator_options = AcceleratorOptions(
-            device=device,
-            num_threads=4,  # Default to 4 threads
         )
 
-        doc_converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options),
-                InputFormat.DOCX: {},  # Default options for DOCX
-                InputFormat.IMAGE: {"ocr_options": {"do_ocr": pipeline_settings["do_ocr"]}},
-            }
+    stats.extend(f"Stage {format_span(record)}" for record in process_stats["stages"])
+    return "\n".join(["Processing Statistics:", *[f"- {stat}" for stat in stats]])
+
+
+@st.fragment(run_every=2)
+def render_jobs(client_id: str):
+    """Poll and show this browser's jobs without blocking the rest of the page."""
+    job_manager = get_job_manager()
+    jobs = job_manager.jobs_for(client_id)
+    if not jobs:
+        return
+
+    st.subheader("Documents")
+    st.caption(
+        f"Server load: {job_manager.running_count()}/{job_manager.max_running} running, "
+        f"{job_manager.queued_count()} queued"
+    )
+
+    for job in jobs:
+        if job.status == QUEUED:
+            st.info(f"{job.name}: waiting for a free worker")
+        elif job.status == RUNNING:
+            st.info(f"{job.name}: {job.stage} ({job.elapsed:.0f}s)")
+        elif job.status == FAILED or "Error" in job.result[0]:
+            st.error(f"{job.name}: {job.error or job.result[0]}")
+        else:
+            st.success(f"{job.name}: processed successfully!")
+            with st.expander("Processing Statistics"):
+                st.info(format_statistics(job))
+
+
+@st.fragment
+def render_search():
+    """Full-text search over the chapters of every processed document."""
+    st.subheader("Search Library")
+    query = st.text_input("Search chapters", placeholder="e.g. eigenvalue decomposition")
+    if not query:
+        index_stats = get_search_index().stats()
+        st.caption(
+            f"{index_stats['chapters']:,} chapters from {index_stats['documents']:,} "
+            "documents indexed"
         )
-
-        # Convert document
-        logger.info("Starting document conversion")
-        result = doc_converter.convert(temp_path)
-        doc = result.document
-        logger.info("Document conversion completed")
-
-        # Process document
-        doc = processor.update_image_links(doc)
-        chapters = []
-
-        # Split into chapters if enabled
-        if pipeline_settings["enable_chapters"]:
-            logger.debug("Starting chapter splitting process")
-            chapters = processor.split_into_chapters(
-                doc,
-                heading_level=pipeline_settings["heading_level"],
-                min_words=pipeline_settings["min_words"],
-                max_words=pipeline_settings["max_words"],
-            )
-
-            # Save main markdown file with chapter links
-            logger.debug(f"Created {len(chapters)} chapters")
-            main_md = ["# " + temp_path.stem + "\n"]
-            main_md.append("## Chapters\n")
-
-            for title, _, path in chapters:
-                main_md.append(f"- [{title}](chapters/{path.name})")
-
-            main_md.append("\n" + doc.export_to_markdown())
-            main_content = "\n".join(main_md)
+        return
+
+    start_time = time.perf_counter()
+    hits = get_search_index().search(query)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    st.caption(f"{len(hits)} results in {elapsed_ms:.0f} ms")
+
+    for hit in hits:
+        st.markdown(f"**{hit['title']}** — {hit['document']}")
+        if hit["heading_path"] != hit["title"]:
+            st.caption(hit["heading_path"])
+        # Snippets are cut from markdown; keep them on one line
+        st.markdown(" ".join(hit["snippet"].split()))
+        if hit["bundle"] is not None:
+            st.caption(f"{hit['bundle']} → {hit['member']}")
         else:
-            # Just save the document without chapters
-            logger.debug("Chapter splitting disabled, saving single document")
-            main_content = doc.export_to_markdown()
+            st.caption(str(hit["file_path"]))
+
+
+@st.cache_data(max_entries=CHAPTER_CACHE_SIZE, show_spinner=False)
+def load_chapter_pages(doc_path: str, modified: float, member: str) -> list:
+    """Read one chapter and split it into pages; modified keys out stale renderings."""
+    with DocumentView(Path(doc_path)) as view:
+        return paginate(view.read_text(member))
+
+
+@st.fragment
+def render_browser(output_root: Path = Path("output")):
+    """Browse processed documents one chapter page at a time."""
+    st.subheader("Browse Documents")
+    documents = list_documents(output_root)
+    if not documents:
+        st.caption("No processed documents yet")
+        return
+
+    doc_path = st.selectbox(
+        "Document",
+        documents,
+        format_func=lambda path: document_label(path, output_root),
+    )
+    with DocumentView(doc_path) as view:
+        entries = view.entries()
+        modified = view.modified()
+    entry_idx = st.selectbox(
+        "Chapter", range(len(entries)), format_func=lambda idx: entries[idx]["title"]
+    )
+
+    # Only the selected chapter is read, and only the current page is rendered
+    pages = load_chapter_pages(str(doc_path), modified, entries[entry_idx]["path"])
+    page_no = 1
+    if len(pages) > 1:
+        page_no = st.number_input(
+            f"Page (of {len(pages)})",
+            min_value=1,
+            max_value=len(pages),
+            value=1,
+            key=f"page:{doc_path}:{entry_idx}",
+        )
+
+    with DocumentView(doc_path) as view:
+        for kind, value in split_images(pages[page_no - 1]):
+            if kind == "text":
+                st.markdown(value)
+                continue
+            # Images are loaded one at a time, only for the page on screen
+            try:
+                st.image(view.read_image(value))
+            except (KeyError, OSError, ValueError):
+                st.caption(f"Image not found: {value}")
+
+
+def show_engine_status():
+    """Show whether the document engine has finished loading in the background."""
+    engine = get_engine()
+    if engine.ready:
+        st.caption(engine.status())
+    elif engine.failed:
+        st.error(engine.status())
+    elif engine.finished:
+        st.warning(engine.status())
+    else:
+        st.info(f"{engine.status()} Documents can be queued in the meantime.")
+
 
-        (output_dir / f"{temp_path.stem}.md").write_text(main_content)
-        return "Success", main_content, chapters
+@st.fragment(run_every=2)
+def render_engine_status():
+    """Poll the engine status until the warm-up has finished."""
+    show_engine_status()
 
-    except Exception as e:
-        logger.exception("Document processing failed")
-        return f"Error: {str(e)}", None, []
-    finally:
-        # Cleanup
-        temp_path.unlink(missing_ok=True)
-        logger.debug("Cleaned up temporary files")
+
+@st.cache_resource
+def cleanup_stale_jobs() -> int:
+    """Remove temp files left behind by crashed processes, once per process."""
+    return sweep_stale_job_dirs()
 
 
 def main():
@@ -119,7 +224,17 @@ def main():
     logger = logging.getLogger(__name__)
     logger.info("Starting Document Processor application")
 
+    cleanup_stale_jobs()
+    # Import docling and load the default models without holding up the page
+    engine = get_engine().start()
+
     st.title("Document Processor")
+    with st.sidebar:
+        if engine.finished:
+            show_engine_status()
+        else:
+            # Poll only until the engine has loaded
+            render_engine_status()
 
     # Pipeline options in sidebar
     st.sidebar.header("Processing Options")
@@ -127,9 +242,38 @@ def main():
     # OCR and Table Options
     st.sidebar.subheader("Document Processing")
     do_ocr = st.sidebar.checkbox("Enable OCR", value=True)
+    ocr_auto = st.sidebar.checkbox(
+        "Only OCR Pages Without Text",
+        value=False,
+        disabled=not do_ocr,
+        help="Check each PDF page for a usable text layer and run OCR only where it is missing",
+    )
     do_table_structure = st.sidebar.checkbox("Process Tables", value=True)
+    triage_tables = st.sidebar.checkbox(
+        "Only Analyze Tables Where Needed",
+        value=False,
+        disabled=not (do_ocr and ocr_auto and do_table_structure),
+        help="Skip table-structure analysis on text pages without ruling lines",
+    )
     ocr_lang = st.sidebar.text_input("OCR Languages (comma-sep)", value="en")
     accelerator_device = st.sidebar.selectbox("Accelerator Device", ["AUTO", "CPU", "GPU"], index=0)
+    shard_pages = st.sidebar.number_input(
+        "Pages per Shard",
+        min_value=0,
+        max_value=1000,
+        value=0,
+        help="Convert large PDFs in parallel page ranges of this size (0=off)",
+    )
+    page_cache = st.sidebar.checkbox(
+        "Reuse Unchanged Pages",
+        value=False,
+        help="Cache converted PDF pages so re-uploaded revisions only convert changed pages",
+    )
+    cpu = get_cpu_budget().snapshot()
+    st.sidebar.caption(
+        f"CPU budget: {cpu['cores']} usable cores, {cpu['running']} conversions running; "
+        f"the next conversion gets {cpu['next_threads']} threads"
+    )
 
     # Chapter Splitting Options
     st.sidebar.subheader("Chapter Configuration")
@@ -169,60 +313,73 @@ def main():
             st.sidebar.error("Maximum words must be greater than minimum words")
             return
 
+    # Output Options
+    st.sidebar.subheader("Output")
+    packed_output = st.sidebar.checkbox(
+        "Pack Output into One File",
+        value=False,
+        help="Store each document as a single indexed .docpack file instead of a folder tree",
+    )
+
+    # Collect pipeline settings
+    pipeline_settings = {
+        "do_ocr": do_ocr,
+        "do_table_structure": do_table_structure,
+        "ocr_auto": ocr_auto,
+        "triage_tables": triage_tables,
+        "ocr_lang": ocr_lang,
+        "accelerator_device": accelerator_device,
+        "shard_pages": shard_pages,
+        "page_cache": page_cache,
+        "enable_chapters": enable_chapters,
+        "heading_level": heading_level,
+        "min_words": min_words,
+        "max_words": max_words,
+        "packed_output": packed_output,
+    }
+
+    # Jobs belong to a browser id kept in the URL, so they survive page refreshes
+    client_id = st.query_params.get("client")
+    if not client_id:
+        client_id = uuid.uuid4().hex
+        st.query_params["client"] = client_id
+
     # File upload
-    uploaded_file = st.file_uploader("Choose a file", type=["pdf", "docx", "jpg", "jpeg", "png"])
-
-    if uploaded_file:
-        with st.spinner("Processing document..."):
-            # Setup directory structure
-            doc_name = Path(uploaded_file.name).stem
-            logger.info(f"Processing document: {doc_name}")
-            output_dir = setup_directories(doc_name)
-
-            # Collect pipeline settings
-            pipeline_settings = {
-                "do_ocr": do_ocr,
-                "do_table_structure": do_table_structure,
-                "ocr_lang": ocr_lang,
-                "accelerator_device": accelerator_device,
-                "enable_chapters": enable_chapters,
-                "heading_level": heading_level,
-                "min_words": min_words,
-                "max_words": max_words,
-            }
-
-            # Process document with timing
-            start_time = time.time()
-            logger.debug(f"Starting document processing with settings: {pipeline_settings}")
-            status, markdown, chapters = process_document(
-                uploaded_file, output_dir, pipeline_settings
-            )
-            end_time = time.time() - start_time
-            logger.info(f"Document processing completed in {end_time:.2f} seconds")
-
-            # Show results
-            if "Error" in status:
-                logger.error(f"Processing failed: {status}")
-                st.error(status)
-            else:
-                logger.info("Document processed successfully")
-                st.success(f"Document processed successfully!")
-
-                # Show statistics
-                stats = [f"Time taken: {end_time:.2f} seconds"]
-
-                if enable_chapters and chapters:
-                    total_chapters = len(chapters)
-                    total_words = sum(len(content.split()) for _, content, _ in chapters)
-                    stats.extend(
-                        [
-                            f"Total chapters: {total_chapters}",
-                            f"Total words: {total_words:,}",
-                            f"Average words per chapter: {total_words / total_chapters:,.0f}",
-                        ]
-                    )
-
-                st.info("\n".join(["Processing Statistics:", *[f"- {stat}" for stat in stats]]))
+    uploaded_files = st.file_uploader(
+        "Choose files", type=["pdf", "docx", "jpg", "jpeg", "png"], accept_multiple_files=True
+    )
+
+    # Documents on shared storage are converted in place, without an upload
+    server_paths = []
+    if shared_roots():
+        server_paths_input = st.text_area(
+            "Or convert files on the server (one path per line)",
+            help="Paths must be inside a shared document directory",
+        )
+        server_paths = [line.strip() for line in server_paths_input.splitlines() if line.strip()]
+
+    sources = [*(uploaded_files or []), *server_paths]
+    if sources and st.button(f"Process {len(sources)} document(s)"):
+        job_manager = get_job_manager()
+        for source in sources:
+            if isinstance(source, str):
+                try:
+                    source = resolve_server_path(source)
+                except ValueError as e:
+                    st.error(str(e))
+                    continue
+            logger.info("Submitting document: %s", source.name)
+            logger.debug("Pipeline settings: %s", pipeline_settings)
+            try:
+                job_manager.submit(source, client_id, dict(pipeline_settings), run_job)
+            except QueueFullError as e:
+                logger.warning("Rejected %s: %s", source.name, e)
+                st.error(f"{source.name}: {e}")
+                break
+
+    render_jobs(client_id)
+    render_search()
+    render_browser()
 
 
 if __name__ == "__main__":
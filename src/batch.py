@@ -0,0 +1,252 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import json
+import logging
+import sys
+import time
+from logger import configure_logging
+from bundle import bundle_path
+from cpu_budget import apply_thread_limits, available_cores
+from converter_pool import get_converter_pool
+from pipeline import process_document, setup_directories
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".jpg", ".jpeg", ".png"}
+
+
+def find_documents(input_dir: Path) -> List[Path]:
+    """Return all supported documents below input_dir in a stable order."""
+    return sorted(
+        path
+        for path in input_dir.rglob("*")
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def output_name(input_dir: Path, source_path: Path) -> str:
+    """Mirror the input tree so documents with the same name in different folders don't collide."""
+    return str(source_path.relative_to(input_dir).with_suffix(""))
+
+
+def is_completed(output_root: Path, doc_name: str) -> bool:
+    """A document is complete once its main markdown file or its bundle has been written."""
+    output_dir = output_root / doc_name
+    return (output_dir / f"{output_dir.name}.md").exists() or bundle_path(output_dir).exists()
+
+
+def init_worker(pipeline_settings: dict):
+    """Set up logging, thread limits and a warm converter once per worker process."""
+    configure_logging()
+    apply_thread_limits(pipeline_settings["num_threads"])
+    pool = get_converter_pool()
+    pool.num_threads = pipeline_settings["num_threads"]
+    pool.prewarm(pipeline_settings)
+
+
+def convert_one(
+    source_path: Path, doc_name: str, output_root: Path, pipeline_settings: dict
+) -> dict:
+    """Convert a single document inside a worker process."""
+    start_time = time.time()
+    output_dir = setup_directories(doc_name, output_root)
+    status, _, chapters, stats = process_document(
+        source_path, output_dir, pipeline_settings, output_root=output_root
+    )
+    return {
+        "source": str(source_path),
+        "status": status,
+        "chapters": len(chapters),
+        "pages": stats.get("pages", 0),
+        "seconds": time.time() - start_time,
+    }
+
+
+def run_batch(
+    input_dir: Path,
+    output_root: Path,
+    pipeline_settings: dict,
+    workers: int,
+    force: bool = False,
+) -> dict:
+    """Convert every supported document below input_dir and return a summary report."""
+    logger = logging.getLogger(__name__)
+    documents = find_documents(input_dir)
+    logger.info("Found %d documents in %s", len(documents), input_dir)
+
+    pending = []
+    skipped = 0
+    for source_path in documents:
+        doc_name = output_name(input_dir, source_path)
+        if not force and is_completed(output_root, doc_name):
+            logger.debug("Skipping completed document: %s", source_path)
+            skipped += 1
+            continue
+        pending.append((source_path, doc_name))
+
+    results = []
+    start_time = time.time()
+    if pending:
+        logger.info(
+            "Using %d workers with %d threads each (%d usable cores)",
+            workers,
+            pipeline_settings["num_threads"],
+            available_cores(),
+        )
+        # Spawn keeps torch and OCR runtimes from inheriting forked parent state
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(pipeline_settings,),
+        ) as executor:
+            futures = {
+                executor.submit(
+                    convert_one, source_path, doc_name, output_root, pipeline_settings
+                ): source_path
+                for source_path, doc_name in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.exception("Worker failed on %s", futures[future])
+                    result = {
+                        "source": str(futures[future]),
+                        "status": f"Error: {str(e)}",
+                        "chapters": 0,
+                        "pages": 0,
+                        "seconds": 0.0,
+                    }
+                results.append(result)
+                print(
+                    f"[{len(results)}/{len(pending)}] {result['status']}: {result['source']} "
+                    f"({result['pages']} pages, {result['seconds']:.1f}s)"
+                )
+    elapsed = time.time() - start_time
+
+    succeeded = [r for r in results if r["status"] == "Success"]
+    total_pages = sum(r["pages"] for r in succeeded)
+    return {
+        "documents": len(documents),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "skipped": skipped,
+        "pages": total_pages,
+        "elapsed_seconds": elapsed,
+        "pages_per_second": total_pages / elapsed if elapsed else 0.0,
+        "docs_per_minute": len(succeeded) / elapsed * 60 if elapsed else 0.0,
+        "failures": [r for r in results if r["status"] != "Success"],
+    }
+
+
+def format_report(report: dict) -> str:
+    """Render the summary report for the terminal."""
+    lines = [
+        "Batch Summary:",
+        f"- Documents found: {report['documents']}",
+        f"- Converted: {report['succeeded']}",
+        f"- Failed: {report['failed']}",
+        f"- Skipped (already completed): {report['skipped']}",
+        f"- Pages: {report['pages']:,}",
+        f"- Time taken: {report['elapsed_seconds']:.2f} seconds",
+        f"- Throughput: {report['pages_per_second']:.2f} pages/s, "
+        f"{report['docs_per_minute']:.2f} docs/min",
+    ]
+    lines.extend(f"- {r['status']}: {r['source']}" for r in report["failures"])
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    default_workers = max(1, available_cores() // 4)
+    parser = argparse.ArgumentParser(
+        description="Convert a directory tree of documents into structured markdown."
+    )
+    parser.add_argument("input_dir", type=Path, help="Directory to search for documents")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=Path("output"), help="Output root directory"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=default_workers,
+        help=f"Number of worker processes (default: {default_workers})",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Converter threads per worker (default: usable cores divided by workers)",
+    )
+    parser.add_argument("--no-ocr", action="store_true", help="Disable OCR")
+    parser.add_argument(
+        "--ocr-auto", action="store_true", help="Only OCR PDF pages without a usable text layer"
+    )
+    parser.add_argument(
+        "--triage-tables",
+        action="store_true",
+        help="With --ocr-auto, only analyze table structure on pages likely to hold tables",
+    )
+    parser.add_argument("--no-tables", action="store_true", help="Disable table processing")
+    parser.add_argument("--ocr-lang", default="en", help="OCR languages (comma-sep)")
+    parser.add_argument("--device", default="AUTO", choices=["AUTO", "CPU", "GPU"])
+    parser.add_argument(
+        "--page-cache",
+        action="store_true",
+        help="Cache converted PDF pages so revised documents only convert changed pages",
+    )
+    parser.add_argument("--no-chapters", action="store_true", help="Disable chapter splitting")
+    parser.add_argument("--heading-level", type=int, default=1, choices=range(1, 7))
+    parser.add_argument("--min-words", type=int, default=500)
+    parser.add_argument("--max-words", type=int, default=8000)
+    parser.add_argument(
+        "--force", action="store_true", help="Re-convert documents that already have output"
+    )
+    parser.add_argument(
+        "--packed", action="store_true", help="Write each document as a single .docpack bundle"
+    )
+    parser.add_argument("--report", type=Path, help="Write the summary report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    configure_logging()
+
+    if not args.input_dir.is_dir():
+        print(f"Error: {args.input_dir} is not a directory", file=sys.stderr)
+        return 2
+    if args.min_words >= args.max_words:
+        print("Error: --max-words must be greater than --min-words", file=sys.stderr)
+        return 2
+
+    workers = max(1, args.workers)
+    pipeline_settings = {
+        "do_ocr": not args.no_ocr,
+        "do_table_structure": not args.no_tables,
+        "ocr_auto": args.ocr_auto,
+        "triage_tables": args.triage_tables,
+        "ocr_lang": args.ocr_lang,
+        "accelerator_device": args.device,
+        "num_threads": args.threads or max(1, available_cores() // workers),
+        "page_cache": args.page_cache,
+        "enable_chapters": not args.no_chapters,
+        "heading_level": args.heading_level,
+        "min_words": args.min_words,
+        "max_words": args.max_words,
+        "packed_output": args.packed,
+    }
+
+    report = run_batch(args.input_dir, args.output, pipeline_settings, workers, args.force)
+    print(format_report(report))
+
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
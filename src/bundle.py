@@ -0,0 +1,191 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+import argparse
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import zipfile
+
+BUNDLE_SUFFIX = ".docpack"
+TOC_NAME = "toc.json"
+BUNDLE_VERSION = 1
+
+# Titles, paths and word counts of the written chapters, for browsing without re-splitting
+CHAPTER_MANIFEST = "chapters.json"
+
+# Offsets into a zip local file header
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_LENGTHS = struct.Struct("<HH")
+LOCAL_HEADER_LENGTHS_OFFSET = 26
+
+
+def bundle_path(output_dir: Path) -> Path:
+    """Path of the packed bundle for a document output directory."""
+    return output_dir.parent / f"{output_dir.name}{BUNDLE_SUFFIX}"
+
+
+def _chapter_entries(output_dir: Path, chapters: List[Tuple[str, Path]]) -> List[dict]:
+    """Chapter entries from the splitter's manifest, which also carries word counts."""
+    if not chapters:
+        return []
+    try:
+        return json.loads((output_dir / CHAPTER_MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return [{"title": title, "path": f"chapters/{path.name}"} for title, path in chapters]
+
+
+def pack_directory(output_dir: Path, main_path: Path, chapters: List[Tuple[str, Path]]) -> Path:
+    """
+    Pack a document output directory into a single bundle next to it.
+
+    The bundle is an uncompressed zip with the same layout as the directory plus a
+    table of contents, so any member can be read in place from a memory map. Images
+    are already deduplicated by content when they are exported, and each is stored once.
+    Returns the bundle path; the directory is left in place.
+    """
+    logger = logging.getLogger(__name__)
+    target = bundle_path(output_dir)
+    images = sorted(path for path in (output_dir / "images").glob("*") if path.is_file())
+    toc = {
+        "version": BUNDLE_VERSION,
+        "document": output_dir.name,
+        "main": main_path.name,
+        "chapters": _chapter_entries(output_dir, chapters),
+        "images": [f"images/{image.name}" for image in images],
+    }
+
+    tmp_path = target.with_suffix(f".{os.getpid()}.tmp")
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr(TOC_NAME, json.dumps(toc, ensure_ascii=False))
+        archive.write(main_path, toc["main"])
+        for chapter in toc["chapters"]:
+            archive.write(output_dir / chapter["path"], chapter["path"])
+        for name, image in zip(toc["images"], images):
+            archive.write(image, name)
+    os.replace(tmp_path, target)
+    logger.info(
+        "Packed %s into %s (%d chapters, %d images)",
+        output_dir,
+        target,
+        len(chapters),
+        len(images),
+    )
+    return target
+
+
+class BundleReader:
+    """
+    Random access to the members of a bundle through a read-only memory map.
+
+    read() returns zero-copy views into the map; release them before close().
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = path.open("rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            # Compressed members are read through the file; mmap is not seekable before 3.13
+            self._archive = zipfile.ZipFile(self._file)
+            self.toc = json.loads(bytes(self.read(TOC_NAME)))
+        except Exception:
+            self._file.close()
+            raise
+
+    @property
+    def document(self) -> str:
+        return self.toc["document"]
+
+    @property
+    def chapters(self) -> List[dict]:
+        """Chapters in reading order, each with title and member path."""
+        return self.toc["chapters"]
+
+    @property
+    def images(self) -> List[str]:
+        return self.toc["images"]
+
+    def names(self) -> List[str]:
+        return self._archive.namelist()
+
+    def read(self, name: str) -> memoryview:
+        """Contents of one member. Raises KeyError if the bundle has no such member."""
+        info = self._archive.getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED:
+            return memoryview(self._archive.read(info))
+        name_length, extra_length = LOCAL_HEADER_LENGTHS.unpack_from(
+            self._map, info.header_offset + LOCAL_HEADER_LENGTHS_OFFSET
+        )
+        start = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+        return memoryview(self._map)[start : start + info.file_size]
+
+    def main_markdown(self) -> str:
+        return str(self.read(self.toc["main"]), "utf-8")
+
+    def chapter(self, idx: int) -> str:
+        """Markdown of the chapter at position idx in the table of contents."""
+        return str(self.read(self.chapters[idx]["path"]), "utf-8")
+
+    def close(self):
+        self._archive.close()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "BundleReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_bundle(path: Path, output_root: Optional[Path] = None) -> Path:
+    """
+    Expand a bundle back into the regular output layout under output_root (default:
+    the bundle's directory). Returns the document output directory.
+    """
+    with zipfile.ZipFile(path) as archive:
+        toc = json.loads(archive.read(TOC_NAME))
+        output_dir = (output_root or path.parent) / toc["document"]
+        (output_dir / "images").mkdir(parents=True, exist_ok=True)
+        (output_dir / "chapters").mkdir(parents=True, exist_ok=True)
+        for info in archive.infolist():
+            if info.filename == TOC_NAME:
+                continue
+            # Members come from our own layout; refuse anything that would escape it
+            target = (output_dir / info.filename).resolve()
+            if not target.is_relative_to(output_dir.resolve()):
+                raise ValueError(f"Unexpected member {info.filename} in {path}")
+            with archive.open(info) as src, target.open("wb") as dst:
+                shutil.copyfileobj(src, dst)
+    return output_dir
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Expand packed document bundles into the regular output layout."
+    )
+    parser.add_argument("bundles", type=Path, nargs="+", help=f"{BUNDLE_SUFFIX} files")
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Output root directory (default: next to each bundle)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    for path in args.bundles:
+        try:
+            output_dir = export_bundle(path, args.output)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            print(f"Error: cannot export {path}: {e}", file=sys.stderr)
+            return 1
+        print(f"Exported {path} to {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
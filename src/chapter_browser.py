@@ -0,0 +1,148 @@
+from pathlib import Path
+from typing import List, Tuple
+import json
+import os
+import re
+from bundle import BUNDLE_SUFFIX, CHAPTER_MANIFEST, BundleReader
+
+PAGE_WORDS = 1500
+
+# Subdirectories of a document output folder
+DOCUMENT_SUBDIRS = ("images", "chapters")
+
+# Markdown image references, e.g. ![Figure 1](images/image_3.png)
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)\)")
+
+# Chapter links in the main markdown file of outputs written before the manifest existed
+CHAPTER_LINK_PATTERN = re.compile(r"^- \[(.*)\]\((chapters/[^)]+)\)$", re.MULTILINE)
+
+
+def list_documents(output_root: Path) -> List[Path]:
+    """
+    Processed documents anywhere below output_root: output folders and packed bundles.
+    Batch output mirrors the input tree, so documents may be nested in plain folders.
+    """
+    if not output_root.is_dir():
+        return []
+    documents = []
+    for dirpath, dirnames, filenames in os.walk(output_root):
+        directory = Path(dirpath)
+        if f"{directory.name}.md" in filenames and directory != output_root:
+            documents.append(directory)
+            # Images and chapters of a document never hold other documents
+            dirnames[:] = [name for name in dirnames if name not in DOCUMENT_SUBDIRS]
+        documents.extend(directory / name for name in filenames if name.endswith(BUNDLE_SUFFIX))
+    return sorted(documents, key=lambda path: str(path.relative_to(output_root)).lower())
+
+
+def document_label(path: Path, output_root: Path) -> str:
+    """Name of a document for selection lists: its path below output_root."""
+    label = path.relative_to(output_root).as_posix()
+    if path.suffix == BUNDLE_SUFFIX:
+        return f"{label[: -len(BUNDLE_SUFFIX)]} (packed)"
+    return label
+
+
+class DocumentView:
+    """
+    Read access to one processed document, stored as an output folder or a bundle.
+    Only the members that are asked for are read.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._bundle = BundleReader(path) if path.suffix == BUNDLE_SUFFIX else None
+        if self._bundle is not None:
+            self.name = self._bundle.document
+            self.main = self._bundle.toc["main"]
+            self.chapters = self._bundle.chapters
+        else:
+            self.name = path.name
+            self.main = f"{path.name}.md"
+            self.chapters = self._folder_chapters()
+
+    def _folder_chapters(self) -> List[dict]:
+        try:
+            return json.loads((self.path / CHAPTER_MANIFEST).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            pass
+        # Fall back to the chapter links in the header of the main file
+        links = []
+        with (self.path / self.main).open(encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("- ["):
+                    links.append(line)
+                elif links or not (line.startswith("#") or not line.strip()):
+                    break
+        return [
+            {"title": title, "path": path}
+            for title, path in CHAPTER_LINK_PATTERN.findall("".join(links))
+        ]
+
+    def modified(self) -> float:
+        """Modification time of the stored output, to invalidate cached renderings."""
+        target = self.path if self._bundle is not None else self.path / self.main
+        return target.stat().st_mtime
+
+    def entries(self) -> List[dict]:
+        """Chapters to browse; documents without chapters are browsed as a whole."""
+        return self.chapters or [{"title": self.name, "path": self.main}]
+
+    def read_text(self, member: str) -> str:
+        if self._bundle is not None:
+            return str(self._bundle.read(member), "utf-8")
+        return (self.path / member).read_text(encoding="utf-8")
+
+    def read_image(self, member: str) -> bytes:
+        """Bytes of an image referenced by the markdown, e.g. images/image_3.png."""
+        if self._bundle is not None:
+            return bytes(self._bundle.read(member))
+        target = (self.path / member).resolve()
+        if not target.is_relative_to(self.path.resolve()):
+            raise ValueError(f"{member} is outside {self.path}")
+        return target.read_bytes()
+
+    def close(self):
+        if self._bundle is not None:
+            self._bundle.close()
+
+    def __enter__(self) -> "DocumentView":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def paginate(markdown: str, page_words: int = PAGE_WORDS) -> List[str]:
+    """Split markdown into pages of about page_words words at paragraph boundaries."""
+    pages = []
+    current = []
+    words = 0
+    for paragraph in markdown.split("\n\n"):
+        paragraph_words = len(paragraph.split())
+        if current and words + paragraph_words > page_words:
+            pages.append("\n\n".join(current))
+            current = []
+            words = 0
+        current.append(paragraph)
+        words += paragraph_words
+    if current:
+        pages.append("\n\n".join(current))
+    return pages
+
+
+def split_images(page: str) -> List[Tuple[str, str]]:
+    """
+    Split a page into ("text", markdown) and ("image", member path) segments so
+    images can be loaded one by one as the page is shown.
+    """
+    segments = []
+    position = 0
+    for match in IMAGE_PATTERN.finditer(page):
+        if match.start() > position:
+            segments.append(("text", page[position : match.start()]))
+        segments.append(("image", match.group(2)))
+        position = match.end()
+    if position < len(page):
+        segments.append(("text", page[position:]))
+    return segments
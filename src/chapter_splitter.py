@@ -1,13 +1,81 @@
+from contextlib import nullcontext
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
+import json
 import logging
-from docling_core.types.doc import DoclingDocument, TextItem, NodeItem
+from docling_core.types.doc import DoclingDocument, SectionHeaderItem, TextItem, TitleItem
+from bundle import CHAPTER_MANIFEST
+from markdown_render import RenderedMarkdown, render_markdown
+from search_index import SearchIndex
+
+INTRODUCTION_TITLE = "Introduction"
+
+
+class HeadingNode:
+    """A heading and the half-open range of rendered parts it covers, including subheadings."""
+
+    __slots__ = ("title", "level", "start", "end", "children")
+
+    def __init__(self, title: str, level: int, start: int):
+        self.title = title
+        self.level = level
+        self.start = start
+        self.end = start
+        self.children: List["HeadingNode"] = []
+
+
+class HeadingIndex:
+    """
+    Prefix word counts over the rendered markdown parts and a heading tree over them.
+
+    Word counts come from the single rendering pass, so the word count and content of any
+    heading subtree can be derived from its range without re-joining or re-splitting.
+    """
+
+    def __init__(self, rendered: RenderedMarkdown):
+        self.rendered = rendered
+        self.word_prefix: List[int] = [0]
+        for part in rendered.parts:
+            self.word_prefix.append(self.word_prefix[-1] + part.words)
+        self.chapters: List[HeadingNode] = []
+
+    def words(self, start: int, end: int) -> int:
+        return self.word_prefix[end] - self.word_prefix[start]
+
+    def content(self, start: int, end: int) -> memoryview:
+        """Zero-copy view of the markdown of parts start..end."""
+        parts = self.rendered.parts
+        return self.rendered.slice(parts[start].start, parts[end - 1].end)
+
+
+def get_heading_level(item: TextItem) -> Optional[int]:
+    """Return the markdown heading level of an item, or None if it is not a heading."""
+    # Same levels as export_to_markdown: titles are H1, section headers one below their level
+    if isinstance(item, TitleItem):
+        return 1
+    if isinstance(item, SectionHeaderItem):
+        return item.level + 1
+    # Text items flagged as headings carry their level as a '#' prefix
+    if getattr(item, "style", {}).get("is_heading", False):
+        text = item.text.strip()
+        if text.startswith("#"):
+            return text.split(" ")[0].count("#")
+    return None
+
+
+# (title, start part, end part, heading path)
+ChapterRange = Tuple[str, int, int, Tuple[str, ...]]
 
 
 class ChapterSplitter:
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, search_index: Optional[SearchIndex] = None):
+        self.output_dir = output_dir
         self.chapters_dir = output_dir / "chapters"
+        # Chapters are added to the library search index as they are written
+        self.search_index = search_index
         self.logger = logging.getLogger(__name__)
+        # Per-chapter decisions are counted here and logged once per document
+        self.split_stats = {"skipped": 0, "split": 0, "split_by_paragraphs": 0}
 
     def split_document(
         self,
@@ -15,6 +83,7 @@ class ChapterSplitter:
         heading_level: int = 1,
         min_words: int = 500,
         max_words: int = 8000,
+        rendered: Optional[RenderedMarkdown] = None,
     ) -> List[Tuple[str, str, Path]]:
         """
         Split document into chapters based on heading levels with word count constraints.
@@ -24,149 +93,187 @@ class ChapterSplitter:
             doc: Document to split
             heading_level: Level of headings to split on (1-6)
             min_words: Minimum words per chapter (chapters below this are discarded)
-            max_words: Maximum words per chapter (chapters above this are split further)
+            max_words: Maximum words per chapter (chapters above this are split at the
+                next heading level present, down to paragraphs)
+            rendered: Markdown already rendered from doc, to avoid rendering it again
+        """
+        return [
+            (title, str(content, "utf-8"), path)
+            for title, content, path, _ in self.iter_chapters(
+                doc, heading_level, min_words, max_words, rendered
+            )
+        ]
+
+    def iter_chapters(
+        self,
+        doc: DoclingDocument,
+        heading_level: int = 1,
+        min_words: int = 500,
+        max_words: int = 8000,
+        rendered: Optional[RenderedMarkdown] = None,
+    ) -> Iterator[Tuple[str, memoryview, Path, int]]:
+        """
+        Split document into chapters, writing each chapter to disk as soon as it is final.
+        Yields tuples containing (title, content, file_path, word_count), where content is
+        a zero-copy view of the chapter's UTF-8 markdown inside the rendered buffer.
+
+        Args are the same as for split_document.
         """
         self.logger.info("Starting document splitting process")
-        chapters = []
-        current_chapter = []
-        current_title = "Introduction"
-
-        def is_heading(item: TextItem) -> bool:
-            """Check if item is a heading at the specified level."""
-            if not getattr(item, "style", {}).get("is_heading", False):
-                return False
-            # Count '#' characters at start of text to determine heading level
-            text = item.text.strip()
-            if text.startswith("#"):
-                level = text.split(" ")[0].count("#")
-                is_target = level == heading_level
-                if is_target:
-                    self.logger.debug(f"Found heading at target level {heading_level}: {text}")
-                return is_target
-            return False
-
-        def get_word_count(text: str) -> int:
-            """Get word count from text, stripping markdown formatting."""
-            # Simple word count - could be improved for accuracy
-            return len(text.split())
-
-        def split_by_subheadings(content: str, title: str, level: int) -> List[Tuple[str, str]]:
-            """Recursively split content by next heading level."""
-            if level >= 6:  # Max heading level
-                self.logger.debug(f"Reached max heading level for {title}, splitting by paragraphs")
-                # Split by paragraphs as fallback
-                paragraphs = content.split("\n\n")
-                result = []
-                current_content = []
-                current_words = 0
-
-                for p in paragraphs:
-                    p_words = get_word_count(p)
-                    if current_words + p_words > max_words:
-                        if current_content:
-                            part_num = len(result) + 1
-                            self.logger.debug(
-                                f"Creating new part {part_num} for {title} due to word limit"
-                            )
-                            result.append(
-                                (f"{title} (Part {part_num})", "\n\n".join(current_content))
-                            )
-                        current_content = [p]
-                        current_words = p_words
-                    else:
-                        current_content.append(p)
-                        current_words += p_words
-
-                if current_content:
-                    result.append(
-                        (f"{title} (Part {len(result) + 1})", "\n\n".join(current_content))
-                    )
-                return result
-
-            # Create new processor with increased heading level
-            temp_chapters = []
-            current_content = []
-            current_subtitle = title
-
-            lines = content.split("\n")
-            for line in lines:
-                if line.strip().startswith("#" * (level + 1) + " "):
-                    if current_content:
-                        temp_chapters.append((current_subtitle, "\n".join(current_content)))
-                        current_content = []
-                    current_subtitle = line.strip("#").strip()
-                current_content.append(line)
-
-            if current_content:
-                temp_chapters.append((current_subtitle, "\n".join(current_content)))
-
-            return temp_chapters
-
-        def process_node(node: NodeItem):
-            nonlocal current_chapter, current_title
-
-            # Handle nodes without children attribute (e.g., RefItem)
-            if not hasattr(node, "children"):
-                if isinstance(node, TextItem):
-                    current_chapter.append(node.text)
-                return
-
-            for child in node.children:
-                if isinstance(child, TextItem):
-                    if is_heading(child):
-                        # Save previous chapter if it has content
-                        if current_chapter:
-                            chapter_content = "\n\n".join(current_chapter)
-                            chapters.append((current_title, chapter_content))
-                            current_chapter = []
-                        current_title = child.text
-                    current_chapter.append(child.text)
-                else:
-                    process_node(child)
-
-        # Process document body
-        process_node(doc.body)
-
-        # Save last chapter
-        if current_chapter:
-            chapters.append((current_title, "\n\n".join(current_chapter)))
-
-        # Process chapters based on word count limits
-        self.logger.info(f"Processing {len(chapters)} raw chapters")
-        processed_chapters = []
-        for title, content in chapters:
-            word_count = get_word_count(content)
-            self.logger.debug(f"Chapter '{title}' has {word_count} words")
-
-            if word_count < min_words:
-                # Skip chapters that are too short
-                self.logger.debug(f"Skipping chapter '{title}' - too short ({word_count} words)")
-                continue
-            elif word_count > max_words:
-                # Split large chapters by subheadings
-                self.logger.debug(f"Splitting chapter '{title}' - too large ({word_count} words)")
-                subchapters = split_by_subheadings(content, title, heading_level + 1)
-                for sub_title, sub_content in subchapters:
-                    sub_words = get_word_count(sub_content)
-                    if sub_words >= min_words:
-                        processed_chapters.append((sub_title, sub_content))
-            else:
-                processed_chapters.append((title, content))
+        if rendered is None:
+            rendered = render_markdown(doc)
+        index = self.build_index(rendered, heading_level)
+        self.logger.info("Processing %d raw chapters", len(index.chapters))
+        self.split_stats = dict.fromkeys(self.split_stats, 0)
 
         # Create chapters directory
         self.chapters_dir.mkdir(parents=True, exist_ok=True)
 
-        # Write chapters to files and collect paths
-        self.logger.info(f"Writing {len(processed_chapters)} final chapters to disk")
-        result = []
-        for idx, (title, content) in enumerate(processed_chapters):
-            chapter_filename = f"{idx + 1:02d}_{self._sanitize_filename(title)}.md"
-            chapter_path = self.chapters_dir / chapter_filename
-            self.logger.debug(f"Writing chapter {idx + 1}: {chapter_path}")
-            chapter_path.write_text(content)
-            result.append((title, content, chapter_path))
-
-        return result
+        # Resolve word count limits over the heading tree and write chapters as they resolve
+        idx = 0
+        manifest = []
+        writer_context = (
+            self.search_index.writer(self.output_dir) if self.search_index else nullcontext()
+        )
+        with writer_context as writer:
+            for chapter in index.chapters:
+                for title, start, end, heading_path in self._resolve(
+                    index, chapter, min_words, max_words
+                ):
+                    idx += 1
+                    content = index.content(start, end)
+                    chapter_filename = f"{idx:02d}_{self._sanitize_filename(title)}.md"
+                    chapter_path = self.chapters_dir / chapter_filename
+                    self.logger.debug("Writing chapter %d: %s", idx, chapter_path)
+                    chapter_path.write_bytes(content)
+                    if writer is not None:
+                        writer.add(title, heading_path, chapter_path, str(content, "utf-8"))
+                    word_count = index.words(start, end)
+                    manifest.append(
+                        {
+                            "title": title,
+                            "path": f"chapters/{chapter_filename}",
+                            "words": word_count,
+                        }
+                    )
+                    yield title, content, chapter_path, word_count
+
+        (self.output_dir / CHAPTER_MANIFEST).write_text(
+            json.dumps(manifest, ensure_ascii=False), encoding="utf-8"
+        )
+
+        self.logger.info(
+            "Wrote %d final chapters to disk (%d too short, %d split by subheadings, "
+            "%d split by paragraphs)",
+            idx,
+            self.split_stats["skipped"],
+            self.split_stats["split"],
+            self.split_stats["split_by_paragraphs"],
+        )
+
+    def build_index(self, rendered: RenderedMarkdown, heading_level: int) -> HeadingIndex:
+        """
+        Walk the rendered parts once, building a tree of headings at or below heading_level.
+        Headings above heading_level are kept as plain content.
+        """
+        index = HeadingIndex(rendered)
+        stack: List[HeadingNode] = []
+
+        def close(node: HeadingNode, end: int):
+            node.end = end
+
+        def open_introduction(start: int):
+            # Content before the first target heading forms the introduction
+            node = HeadingNode(INTRODUCTION_TITLE, heading_level, start)
+            index.chapters.append(node)
+            stack.append(node)
+
+        for part_idx, part in enumerate(rendered.parts):
+            item = part.item
+            level = get_heading_level(item) if isinstance(item, TextItem) else None
+            if level is not None and level >= heading_level:
+                # Close open headings at the same or a deeper level
+                while stack and stack[-1].level >= level:
+                    close(stack.pop(), part_idx)
+
+                node = HeadingNode(item.text, level, part_idx)
+                if level == heading_level:
+                    index.chapters.append(node)
+                else:
+                    if not stack:
+                        open_introduction(part_idx)
+                    stack[-1].children.append(node)
+                stack.append(node)
+            elif not stack:
+                open_introduction(part_idx)
+
+        while stack:
+            close(stack.pop(), len(rendered.parts))
+
+        self.logger.debug(
+            "Found %d headings at target level %d", len(index.chapters), heading_level
+        )
+
+        return index
+
+    def _resolve(
+        self,
+        index: HeadingIndex,
+        node: HeadingNode,
+        min_words: int,
+        max_words: int,
+        parents: Tuple[str, ...] = (),
+    ) -> Iterator[ChapterRange]:
+        """
+        Yield (title, start, end, heading_path) ranges for a heading subtree that satisfy
+        the word limits. parents holds the titles of the enclosing headings.
+        """
+        word_count = index.words(node.start, node.end)
+        heading_path = parents + (node.title,)
+
+        if word_count < min_words:
+            # Skip chapters that are too short
+            self.split_stats["skipped"] += 1
+            return
+        if word_count <= max_words:
+            yield node.title, node.start, node.end, heading_path
+            return
+
+        if not node.children:
+            yield from self._split_by_paragraphs(index, node, min_words, max_words, heading_path)
+            return
+
+        self.split_stats["split"] += 1
+        # Text before the first subheading stays with this heading
+        lead = HeadingNode(node.title, node.level, node.start)
+        lead.end = node.children[0].start
+        if lead.end > lead.start:
+            yield from self._resolve(index, lead, min_words, max_words, parents)
+
+        for child in node.children:
+            yield from self._resolve(index, child, min_words, max_words, heading_path)
+
+    def _split_by_paragraphs(
+        self,
+        index: HeadingIndex,
+        node: HeadingNode,
+        min_words: int,
+        max_words: int,
+        heading_path: Tuple[str, ...],
+    ) -> Iterator[ChapterRange]:
+        """Pack consecutive paragraphs into parts of at most max_words."""
+        self.split_stats["split_by_paragraphs"] += 1
+        parts = []
+        part_start = node.start
+        for idx in range(node.start, node.end):
+            if idx > part_start and index.words(part_start, idx + 1) > max_words:
+                parts.append((part_start, idx))
+                part_start = idx
+        parts.append((part_start, node.end))
+
+        for part_num, (start, end) in enumerate(parts, start=1):
+            if index.words(start, end) >= min_words:
+                yield f"{node.title} (Part {part_num})", start, end, heading_path
 
     def _sanitize_filename(self, filename: str) -> str:
         """Convert string to valid filename."""
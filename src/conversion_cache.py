@@ -0,0 +1,119 @@
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Optional
+import hashlib
+import json
+import logging
+import os
+from docling_core.types.doc import DoclingDocument
+from converter_pool import converter_key
+
+DEFAULT_CACHE_DIR = Path("cache") / "conversions"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def settings_key(pipeline_settings: dict) -> tuple:
+    """Converter settings that change conversion output."""
+    return converter_key(pipeline_settings)
+
+
+class ConversionCache:
+    """Disk-backed cache of converted documents keyed by file content and conversion settings."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def make_key(self, file_path: Path, pipeline_settings: dict) -> str:
+        """Hash the file bytes together with the settings that change conversion output."""
+        digest = hashlib.sha256()
+        with file_path.open("rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+
+        settings = (
+            *settings_key(pipeline_settings),
+            bool(pipeline_settings.get("ocr_auto", False)),
+            bool(pipeline_settings.get("triage_tables", False)),
+        )
+        digest.update(json.dumps(settings).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[DoclingDocument]:
+        """Load a cached document, or return None on a miss."""
+        path = self._entry_path(key)
+        try:
+            doc = DoclingDocument.load_from_json(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            self.logger.debug("Cache miss for %s", key)
+            return None
+        except ValueError:
+            # Corrupt or incompatible entry; drop it and convert again
+            self.logger.warning("Discarding unreadable cache entry %s", path)
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the entry so eviction drops least recently used documents first
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        self.logger.debug("Cache hit for %s", key)
+        return doc
+
+    def put(self, key: str, doc: DoclingDocument, evict: bool = True):
+        """
+        Store a converted document and evict old entries beyond the size limit.
+        Callers storing many entries at once can pass evict=False and call evict() once.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{get_ident()}.tmp")
+        doc.save_as_json(tmp_path, indent=None)
+        os.replace(tmp_path, path)
+        self.logger.debug("Stored cache entry %s", path)
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self.logger.info("Evicting cache entry %s", path)
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_cache = ConversionCache()
+
+
+def get_conversion_cache() -> ConversionCache:
+    """Return the conversion cache shared by all sessions in this process."""
+    return _cache
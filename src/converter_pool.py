@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Set, Tuple
+import logging
+from cpu_budget import get_cpu_budget, restore_thread_limits
+from docling.document_converter import DocumentConverter, PdfFormatOption
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import (
+    PdfPipelineOptions,
+    AcceleratorDevice,
+    AcceleratorOptions,
+)
+
+# OCR triage converts one document with OCR on or off and tables on or off, so the pool
+# holds every range combination of one triaged document besides the pinned converters
+DEFAULT_MAX_CONVERTERS = 4
+
+# Settings the sidebar starts with; used to prewarm the pool at startup
+DEFAULT_PIPELINE_SETTINGS = {
+    "do_ocr": True,
+    "do_table_structure": True,
+    "ocr_lang": "en",
+    "accelerator_device": "AUTO",
+}
+
+ConverterKey = Tuple[bool, bool, Tuple[str, ...], str]
+
+
+def converter_key(pipeline_settings: dict) -> ConverterKey:
+    """
+    Normalize the settings that affect converter construction into a hashable key.
+    The thread budget is left out: it only affects speed and is applied per conversion.
+    """
+    ocr_lang = tuple(
+        lang.strip()
+        for lang in (pipeline_settings.get("ocr_lang") or "").split(",")
+        if lang.strip()
+    )
+    return (
+        bool(pipeline_settings["do_ocr"]),
+        bool(pipeline_settings["do_table_structure"]),
+        ocr_lang,
+        pipeline_settings["accelerator_device"].upper(),
+    )
+
+
+def build_converter(key: ConverterKey, num_threads: int) -> DocumentConverter:
+    """Build a document converter for a normalized settings key."""
+    do_ocr, do_table_structure, ocr_lang, accelerator_device = key
+
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = do_ocr
+    pipeline_options.do_table_structure = do_table_structure
+    # Keep picture crops on the document so update_image_links can export them
+    pipeline_options.generate_picture_images = True
+
+    # Set OCR languages if provided
+    if ocr_lang:
+        pipeline_options.ocr_options.lang = list(ocr_lang)
+
+    # Configure accelerator
+    device = getattr(AcceleratorDevice, accelerator_device)
+    pipeline_options.accelerator_options = AcceleratorOptions(
+        device=device,
+        num_threads=num_threads,
+    )
+
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options),
+            InputFormat.DOCX: {},  # Default options for DOCX
+            InputFormat.IMAGE: {"ocr_options": {"do_ocr": do_ocr}},
+        }
+    )
+
+
+class ConverterPool:
+    """
+    Process-wide LRU cache of warm document converters keyed by pipeline settings.
+    Prewarmed converters are pinned: they are never evicted and do not count toward
+    max_converters.
+    """
+
+    def __init__(self, max_converters: int = DEFAULT_MAX_CONVERTERS):
+        self.max_converters = max_converters
+        # Threads converters are built with; defaults to the whole CPU budget. Worker
+        # processes with a fixed share of the cores set their share here.
+        self.num_threads: Optional[int] = None
+        self._converters: OrderedDict[ConverterKey, DocumentConverter] = OrderedDict()
+        self._lock = Lock()
+        # One lock per converter being built, so concurrent requests load its models once
+        self._build_locks: Dict[ConverterKey, Lock] = {}
+        self._pinned: Set[ConverterKey] = set()
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, pipeline_settings: dict) -> DocumentConverter:
+        """
+        Return a converter for the given settings, building it on first use.
+        New converters load their PDF pipeline models here, before any conversion runs.
+        """
+        key = converter_key(pipeline_settings)
+        with self._lock:
+            converter = self._lookup(key)
+            if converter is not None:
+                return converter
+            build_lock = self._build_locks.setdefault(key, Lock())
+
+        # Models load outside the pool lock, so warm converters stay available meanwhile
+        with build_lock:
+            with self._lock:
+                converter = self._lookup(key)
+                if converter is not None:
+                    return converter
+
+            num_threads = self.num_threads or get_cpu_budget().threads_for(1)
+            self.logger.info("Building new converter for %s with %d threads", key, num_threads)
+            converter = build_converter(key, num_threads)
+            converter.initialize_pipeline(InputFormat.PDF)
+            # Loading the models set torch to the converter's threads; restore the lease
+            restore_thread_limits()
+
+            with self._lock:
+                self._converters[key] = converter
+                self._build_locks.pop(key, None)
+                self._evict()
+
+            return converter
+
+    def _evict(self):
+        """Evict least recently used unpinned converters to bound model memory."""
+        unpinned = [key for key in self._converters if key not in self._pinned]
+        for evicted_key in unpinned[: max(0, len(unpinned) - self.max_converters)]:
+            del self._converters[evicted_key]
+            self.logger.info("Evicted converter for %s", evicted_key)
+
+    def _lookup(self, key: ConverterKey) -> Optional[DocumentConverter]:
+        converter = self._converters.get(key)
+        if converter is not None:
+            self._converters.move_to_end(key)
+            self.logger.debug("Reusing warm converter for %s", key)
+        return converter
+
+    def prewarm(self, pipeline_settings: dict = DEFAULT_PIPELINE_SETTINGS) -> DocumentConverter:
+        """
+        Build a converter and load its PDF pipeline models ahead of the first upload.
+        The converter is pinned, so jobs with other settings never evict it.
+        """
+        self.logger.info("Prewarming PDF pipeline models")
+        converter = self.get(pipeline_settings)
+        with self._lock:
+            self._pinned.add(converter_key(pipeline_settings))
+        return converter
+
+    def clear(self):
+        """Drop all cached converters."""
+        with self._lock:
+            self._converters.clear()
+            self._pinned.clear()
+
+    def __len__(self) -> int:
+        return len(self._converters)
+
+
+_pool = ConverterPool()
+
+
+def get_converter_pool() -> ConverterPool:
+    """Return the converter pool shared by all sessions in this process."""
+    return _pool
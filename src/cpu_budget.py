@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Iterator, Optional
+import logging
+import math
+import os
+import sys
+
+CGROUP_V2_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+CGROUP_V1_QUOTA = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+CGROUP_V1_PERIOD = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+# Thread pools of the native runtimes under docling (torch, OpenMP, BLAS, onnxruntime)
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container in cores, or None when unlimited or not in a cgroup."""
+    try:
+        quota, period = CGROUP_V2_CPU_MAX.read_text().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(CGROUP_V1_QUOTA.read_text())
+        period = int(CGROUP_V1_PERIOD.read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cores() -> int:
+    """Cores this process may actually use, honoring CPU affinity and cgroup quotas."""
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, math.ceil(limit))
+    return max(1, cores)
+
+
+def apply_thread_limits(num_threads: int):
+    """
+    Apply a thread budget to the native runtimes of this process. The environment
+    covers libraries loaded later and child processes; torch is also set directly
+    when it is already loaded.
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(num_threads)
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.get_num_threads() != num_threads:
+        torch.set_num_threads(num_threads)
+
+
+def restore_thread_limits():
+    """
+    Re-apply the last thread budget after loading models, which resets the torch pool
+    to the thread count of the converter that loads them.
+    """
+    num_threads = os.environ.get(THREAD_ENV_VARS[0], "")
+    if num_threads.isdigit():
+        apply_thread_limits(int(num_threads))
+
+
+class CpuBudget:
+    """
+    Hands each running conversion a fair share of the available cores.
+
+    Converters are built once with the whole budget and shared; running conversions
+    are throttled through the process-wide torch and OpenMP pools, which are set to
+    the fair share at the current concurrency whenever a conversion starts or finishes.
+    """
+
+    def __init__(self, cores: Optional[int] = None):
+        self.cores = cores or available_cores()
+        self._running = 0
+        self._lock = Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def threads_for(self, running: int) -> int:
+        """Thread budget of each conversion when `running` conversions share the cores."""
+        return max(1, self.cores // max(1, running))
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[int]:
+        """Reserve a thread budget for one conversion and apply it; yields the thread count."""
+        with self._lock:
+            self._running += 1
+            running = self._running
+            threads = self.threads_for(running)
+            apply_thread_limits(threads)
+        self.logger.info(
+            "CPU budget for %s: %d threads (%d running, %d cores available)",
+            name,
+            threads,
+            running,
+            self.cores,
+        )
+        try:
+            yield threads
+        finally:
+            with self._lock:
+                self._running -= 1
+                if self._running:
+                    # Let the remaining conversions grow into the freed cores
+                    apply_thread_limits(self.threads_for(self._running))
+
+    def snapshot(self) -> dict:
+        """Current load and the budget the next conversion would get."""
+        with self._lock:
+            return {
+                "cores": self.cores,
+                "running": self._running,
+                "next_threads": self.threads_for(self._running + 1),
+            }
+
+
+_budget = CpuBudget()
+
+
+def get_cpu_budget() -> CpuBudget:
+    """Return the CPU budget shared by all sessions in this process."""
+    return _budget
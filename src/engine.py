@@ -0,0 +1,121 @@
+from threading import Event, Lock, Thread
+from types import ModuleType
+from typing import Optional
+import importlib
+import logging
+from instrumentation import StageTimer
+
+# Importing the pipeline loads docling, torch and the OCR runtimes
+PIPELINE_MODULE = "pipeline"
+
+NOT_STARTED = "not started"
+IMPORTING = "importing"
+LOADING_MODELS = "loading models"
+READY = "ready"
+# The pipeline imported, but the default models could not be loaded ahead of time
+PREWARM_FAILED = "prewarm failed"
+FAILED = "failed"
+
+
+class Engine:
+    """
+    Loads the conversion pipeline and its default models in a background thread,
+    so the UI can render before docling has been imported.
+
+    Callers that need the pipeline earlier block in pipeline() until it is imported.
+    """
+
+    def __init__(self, module_name: str = PIPELINE_MODULE):
+        self.module_name = module_name
+        self.state = NOT_STARTED
+        self.error: Optional[str] = None
+        self.timer = StageTimer()
+        self._module: Optional[ModuleType] = None
+        self._imported = Event()
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def start(self, prewarm: bool = True) -> "Engine":
+        """Start the warm-up thread once; later calls return immediately."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._warm_up, args=(prewarm,), name="engine-warmup", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def _warm_up(self, prewarm: bool):
+        try:
+            self.state = IMPORTING
+            with self.timer.span("engine_import"):
+                self._module = importlib.import_module(self.module_name)
+        except Exception as e:
+            self.logger.exception("Document engine failed to load")
+            self.error = str(e)
+            self.state = FAILED
+            self.timer.log_records(component="engine", state=self.state)
+            return
+        finally:
+            # Never leave callers of pipeline() waiting on a failed import
+            self._imported.set()
+
+        try:
+            if prewarm:
+                self.state = LOADING_MODELS
+                with self.timer.span("model_prewarm"):
+                    self._module.get_converter_pool().prewarm()
+            self.state = READY
+            self.logger.info("Document engine ready: %s", self._format_spans())
+        except Exception as e:
+            # Conversions still work; they load the models themselves
+            self.logger.exception("Prewarming document models failed")
+            self.error = str(e)
+            self.state = PREWARM_FAILED
+        finally:
+            self.timer.log_records(component="engine", state=self.state)
+
+    def _format_spans(self) -> str:
+        return ", ".join(
+            f"{record['stage']} {record.get('seconds', 0.0):.1f}s" for record in self.timer.spans
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    @property
+    def failed(self) -> bool:
+        return self.state == FAILED
+
+    @property
+    def finished(self) -> bool:
+        """Whether the warm-up thread is done, successfully or not."""
+        return self.state in (READY, PREWARM_FAILED, FAILED)
+
+    def pipeline(self) -> ModuleType:
+        """Return the pipeline module, waiting for the warm-up thread to import it."""
+        self.start()
+        self._imported.wait()
+        if self._module is None:
+            raise RuntimeError(f"Document engine failed to load: {self.error}")
+        return self._module
+
+    def status(self) -> str:
+        """One-line description of the engine state for the UI."""
+        if self.state == READY:
+            return f"Engine ready ({self._format_spans()})"
+        if self.state == PREWARM_FAILED:
+            return f"Engine loaded; models will load with the first document ({self.error})"
+        if self.state == FAILED:
+            return f"Engine failed to load: {self.error}"
+        return f"Engine {self.state}..."
+
+
+_engine = Engine()
+
+
+def get_engine() -> Engine:
+    """Return the document engine shared by all sessions in this process."""
+    return _engine
@@ -0,0 +1,72 @@
+from pathlib import Path
+import errno
+import hashlib
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Linux ioctl for cloning file extents (reflink) on btrfs, XFS and similar filesystems
+FICLONE = 0x40049409
+
+# Errors that mean "this filesystem can't do that", as opposed to real I/O failures
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EINVAL,
+    errno.EMLINK,
+}
+
+
+def file_digest(path: Path) -> str:
+    """Hash a file's content in chunks without loading it into memory."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source_path: Path, target_path: Path):
+    with source_path.open("rb") as src, target_path.open("wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target_path.unlink(missing_ok=True)
+            raise
+
+
+def link_or_copy(source_path: Path, target_path: Path) -> str:
+    """
+    Place source_path at target_path as cheaply as the filesystem allows.
+    Tries a hardlink, then a reflink, then a kernel-side copy. Returns the method used.
+    """
+    target_path.unlink(missing_ok=True)
+
+    try:
+        os.link(source_path, target_path)
+        return "hardlink"
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_ERRNOS:
+            raise
+
+    if fcntl is not None:
+        try:
+            _reflink(source_path, target_path)
+            return "reflink"
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+
+    # copyfile uses sendfile/copy_file_range where available, so data stays in the kernel
+    shutil.copyfile(source_path, target_path)
+    return "copy"
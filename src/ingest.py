@@ -0,0 +1,150 @@
+from pathlib import Path
+from typing import List, Optional
+import logging
+import os
+import shutil
+import time
+import uuid
+
+TEMP_ROOT = Path("temp") / "jobs"
+SPOOL_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+OWNER_FILE = ".owner"
+STALE_AFTER_SECONDS = 24 * 60 * 60
+BOOT_ID_PATH = Path("/proc/sys/kernel/random/boot_id")
+
+# Directories (separated by os.pathsep) whose files may be converted in place
+SHARED_ROOTS_ENV = "STUDY_TOOLS_SHARED_ROOTS"
+
+
+def create_job_dir(job_id: Optional[str] = None) -> Path:
+    """Create an isolated temp directory for one job, tagged with the owning process."""
+    job_dir = TEMP_ROOT / (job_id or uuid.uuid4().hex)
+    job_dir.mkdir(parents=True)
+    (job_dir / OWNER_FILE).write_text(process_identity())
+    return job_dir
+
+
+def remove_job_dir(job_dir: Path):
+    shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def spool_upload(uploaded_file, job_dir: Path) -> Path:
+    """Write an uploaded file into job_dir in fixed-size chunks and return its path."""
+    target = job_dir / Path(uploaded_file.name).name
+    with target.open("wb") as f:
+        if hasattr(uploaded_file, "getbuffer"):
+            # In-memory uploads are written from views of their buffer, without a copy
+            with uploaded_file.getbuffer() as view:
+                for offset in range(0, len(view), SPOOL_CHUNK_SIZE):
+                    f.write(view[offset : offset + SPOOL_CHUNK_SIZE])
+        else:
+            shutil.copyfileobj(uploaded_file, f, SPOOL_CHUNK_SIZE)
+    return target
+
+
+def shared_roots() -> List[Path]:
+    """Directories configured for in-place conversion of server-side files."""
+    value = os.environ.get(SHARED_ROOTS_ENV, "")
+    return [Path(root).resolve() for root in value.split(os.pathsep) if root]
+
+
+def resolve_server_path(path: str) -> Path:
+    """
+    Resolve a server-side document path for in-place conversion.
+    Raises ValueError unless the file exists inside one of the shared roots.
+    """
+    resolved = Path(path).expanduser().resolve()
+    if not any(resolved.is_relative_to(root) for root in shared_roots()):
+        raise ValueError(f"{path} is not inside a shared document directory")
+    if not resolved.is_file():
+        raise ValueError(f"{path} does not exist")
+    return resolved
+
+
+def _boot_id() -> str:
+    try:
+        return BOOT_ID_PATH.read_text().strip()
+    except OSError:
+        return ""
+
+
+def _start_time(pid: int) -> str:
+    """Start time of a process in clock ticks since boot, or "" where /proc is unavailable."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return ""
+    # Fields after the parenthesized command name start at field 3; starttime is field 22
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+def process_identity(pid: Optional[int] = None) -> str:
+    """
+    Identify a process as pid:boot_id:start_time. A restarted server often gets the same
+    pid (1 in containers), but never the same start time within one boot.
+    """
+    pid = pid or os.getpid()
+    return f"{pid}:{_boot_id()}:{_start_time(pid)}"
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _owner_alive(owner: str) -> bool:
+    """Whether the process recorded in an owner file is still running."""
+    pid_text, _, rest = owner.partition(":")
+    boot_id, _, start_time = rest.partition(":")
+    try:
+        pid = int(pid_text)
+    except ValueError:
+        # Unreadable owner; leave the directory to the age cutoff
+        return True
+    # Owner files written before boot ids and start times were recorded hold only the pid
+    if boot_id and boot_id != _boot_id():
+        return False
+    if not _process_alive(pid):
+        return False
+    return not start_time or start_time == _start_time(pid)
+
+
+def sweep_stale_job_dirs(max_age: float = STALE_AFTER_SECONDS) -> int:
+    """
+    Remove job directories left behind by crashed processes.
+    A directory is stale when its owning process is gone, or when it is older than
+    max_age and not owned by this process. Returns the number of directories removed.
+    """
+    logger = logging.getLogger(__name__)
+    if not TEMP_ROOT.exists():
+        return 0
+
+    removed = 0
+    now = time.time()
+    this_process = process_identity()
+    for job_dir in TEMP_ROOT.iterdir():
+        if not job_dir.is_dir():
+            continue
+        try:
+            age = now - job_dir.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        try:
+            owner = (job_dir / OWNER_FILE).read_text().strip()
+        except FileNotFoundError:
+            owner = None
+        if owner == this_process:
+            continue
+        stale = age > max_age or (owner is not None and not _owner_alive(owner))
+        if stale:
+            logger.info("Removing stale job directory %s", job_dir)
+            remove_job_dir(job_dir)
+            removed += 1
+    return removed
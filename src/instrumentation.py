@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+import json
+import logging
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+METRICS_LOGGER = "metrics"
+
+
+def peak_rss_bytes() -> int:
+    """Return the process's peak resident set size so far, or 0 if unavailable."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageTimer:
+    """Collects timing and resource records for the stages of one processing job."""
+
+    def __init__(self):
+        self.spans: List[dict] = []
+
+    @contextmanager
+    def span(self, stage: str, **fields) -> Iterator[dict]:
+        """
+        Time a stage. The yielded record can be updated with counts such as pages or bytes.
+        Records are kept in start order, so nested stages follow their parent.
+        """
+        record = {"stage": stage, **fields}
+        self.spans.append(record)
+        rss_before = peak_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            record["peak_rss_delta_bytes"] = peak_rss_bytes() - rss_before
+
+    def log_records(self, **job_fields):
+        """Write one structured JSON record per stage to the metrics log."""
+        logger = logging.getLogger(METRICS_LOGGER)
+        for record in self.spans:
+            logger.info(json.dumps({**job_fields, **record}))
+
+
+def format_span(record: dict) -> str:
+    """Render a stage record for the statistics panel."""
+    parts = [f"{record['stage']}: {record.get('seconds', 0.0):.2f}s"]
+    if record.get("peak_rss_delta_bytes"):
+        parts.append(f"+{record['peak_rss_delta_bytes'] / 1024 / 1024:,.0f} MB peak RSS")
+    if record.get("pages"):
+        parts.append(f"{record['pages']:,} pages")
+    if record.get("bytes"):
+        parts.append(f"{record['bytes'] / 1024 / 1024:,.1f} MB")
+    if record.get("cache_hit") is not None:
+        parts.append("cache hit" if record["cache_hit"] else "cache miss")
+    return ", ".join(parts)
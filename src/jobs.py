@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Callable, List, Optional
+import logging
+import os
+import time
+import uuid
+from cpu_budget import available_cores
+from ingest import create_job_dir, remove_job_dir, spool_upload
+from instrumentation import StageTimer
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DEFAULT_MAX_RUNNING = max(1, available_cores() // 4)
+DEFAULT_MAX_QUEUED = 32
+MAX_FINISHED_JOBS = 200
+
+
+class QueueFullError(RuntimeError):
+    """Raised when admission control rejects a job because the queue is full."""
+
+
+class Job:
+    """A document conversion running in the background, independent of any browser session."""
+
+    def __init__(self, name: str, client_id: str, pipeline_settings: dict):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.client_id = client_id
+        self.pipeline_settings = pipeline_settings
+        self.status = QUEUED
+        self.timer = StageTimer()
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def stage(self) -> str:
+        """Name of the stage the job is currently in."""
+        if self.status != RUNNING:
+            return self.status
+        running = [span["stage"] for span in self.timer.spans if "seconds" not in span]
+        return running[-1] if running else "starting"
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """
+    Bounded executor shared by all sessions in this process.
+
+    At most max_running conversions run at once; further jobs wait in the queue, and
+    submissions beyond max_queued are rejected so the server is not oversubscribed.
+    """
+
+    def __init__(
+        self, max_running: int = DEFAULT_MAX_RUNNING, max_queued: int = DEFAULT_MAX_QUEUED
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def submit(
+        self,
+        source,
+        client_id: str,
+        pipeline_settings: dict,
+        process: Callable,
+    ) -> Job:
+        """
+        Queue a document for processing. source is an uploaded file, which is spooled to
+        an isolated job directory, or a Path on shared storage, which is used in place.
+        process is called as process(source_path, pipeline_settings, timer) and returns
+        the result stored on the job.
+        """
+        with self._lock:
+            queued = sum(job.status == QUEUED for job in self._jobs.values())
+            if queued >= self.max_queued:
+                raise QueueFullError(
+                    f"Too many documents waiting ({queued}), please try again later"
+                )
+            job = Job(source.name, client_id, pipeline_settings)
+            self._jobs[job.id] = job
+            self._prune()
+
+        job_dir = None
+        if isinstance(source, Path):
+            source_path = source
+        else:
+            # Spool now: the uploaded file object does not outlive the current rerun
+            try:
+                job_dir = create_job_dir(job.id)
+                source_path = spool_upload(source, job_dir)
+            except Exception:
+                if job_dir is not None:
+                    remove_job_dir(job_dir)
+                with self._lock:
+                    del self._jobs[job.id]
+                raise
+
+        self.logger.info("Queued job %s for %s", job.id, job.name)
+        self._executor.submit(self._run, job, source_path, job_dir, process)
+        return job
+
+    def _run(self, job: Job, source_path: Path, job_dir: Optional[Path], process: Callable):
+        job.status = RUNNING
+        job.started_at = time.time()
+        self.logger.info("Starting job %s for %s", job.id, job.name)
+        try:
+            job.result = process(source_path, job.pipeline_settings, job.timer)
+            job.status = DONE
+        except Exception as e:
+            self.logger.exception("Job %s failed", job.id)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            if job_dir is not None:
+                remove_job_dir(job_dir)
+            self.logger.info("Job %s finished as %s in %.2fs", job.id, job.status, job.elapsed)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (DONE, FAILED)]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs_for(self, client_id: str) -> List[Job]:
+        """Jobs submitted by one browser, newest first."""
+        with self._lock:
+            return [job for job in reversed(self._jobs.values()) if job.client_id == client_id]
+
+    def running_count(self) -> int:
+        with self._lock:
+            return sum(job.status == RUNNING for job in self._jobs.values())
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return sum(job.status == QUEUED for job in self._jobs.values())
+
+
+_manager = JobManager(
+    max_running=max(1, int(os.environ.get("STUDY_TOOLS_MAX_JOBS", DEFAULT_MAX_RUNNING)))
+)
+
+
+def get_job_manager() -> JobManager:
+    """Return the job manager shared by all sessions in this process."""
+    return _manager
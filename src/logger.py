@@ -1,29 +1,77 @@
 import os
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Root log level, e.g. DEBUG or WARNING (default: INFO)
+LOG_LEVEL_ENV = "STUDY_TOOLS_LOG_LEVEL"
+DEFAULT_LOG_LEVEL = logging.INFO
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves message formatting to the writer thread.
+
+    The stock QueueHandler formats every record on the calling thread so it can be
+    pickled; records here stay in-process, so %-style arguments are only merged when
+    the record is written. Log arguments must therefore not be mutated after logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def log_level() -> int:
+    """Root log level from the environment, falling back to INFO."""
+    level = logging.getLevelName(os.environ.get(LOG_LEVEL_ENV, "").strip().upper())
+    return level if isinstance(level, int) else DEFAULT_LOG_LEVEL
+
+
+def _async_handler(target: logging.Handler) -> QueueHandler:
+    """Wrap a handler so records are written by a background thread."""
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, target)
+    listener.start()
+    # Flush queued records on interpreter exit
+    atexit.register(listener.stop)
+    return DeferredQueueHandler(records)
 
 
 def configure_logging():
-    """Configure application-wide logging with file rotation."""
+    """Configure application-wide logging with file rotation on a background writer thread."""
     # Create logs directory if it doesn't exist
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
 
-    # Create rotating file handler
-    handler = RotatingFileHandler(
-        filename=os.path.join(log_dir, "app.log"),
-        maxBytes=500 * 1024,  # 500KB
-        backupCount=3,
-    )
-
-    # Set log format
-    formatter = logging.Formatter("%(asctime)s|%(levelname)s|%(module)s|%(message)s")
-    handler.setFormatter(formatter)
-
     # Configure root logger
     root_logger = logging.getLogger()
 
     # Only add handler if not already configured
     if not root_logger.handlers:
-        root_logger.addHandler(handler)
-        root_logger.setLevel(logging.DEBUG)
+        # Create rotating file handler
+        handler = RotatingFileHandler(
+            filename=os.path.join(log_dir, "app.log"),
+            maxBytes=10 * 1024 * 1024,  # 10MB
+            backupCount=5,
+        )
+
+        # Set log format
+        formatter = logging.Formatter("%(asctime)s|%(levelname)s|%(module)s|%(message)s")
+        handler.setFormatter(formatter)
+
+        root_logger.addHandler(_async_handler(handler))
+        root_logger.setLevel(log_level())
+
+    # Stage metrics go to their own file as one JSON record per line
+    metrics_logger = logging.getLogger("metrics")
+    if not metrics_logger.handlers:
+        metrics_handler = RotatingFileHandler(
+            filename=os.path.join(log_dir, "metrics.jsonl"),
+            maxBytes=5 * 1024 * 1024,  # 5MB
+            backupCount=3,
+        )
+        metrics_handler.setFormatter(logging.Formatter("%(message)s"))
+        metrics_logger.addHandler(_async_handler(metrics_handler))
+        metrics_logger.setLevel(logging.INFO)
+        metrics_logger.propagate = False
@@ -0,0 +1,55 @@
+from typing import List, Optional
+from docling_core.transforms.serializer.markdown import MarkdownDocSerializer
+from docling_core.types.doc import DocItem, DoclingDocument
+
+# Top-level parts are joined the same way export_to_markdown joins them
+PART_DELIMITER = b"\n\n"
+
+
+class RenderedPart:
+    """Byte range of one top-level markdown part and the first document item it renders."""
+
+    __slots__ = ("start", "end", "item", "words")
+
+    def __init__(self, start: int, end: int, item: Optional[DocItem], words: int):
+        self.start = start
+        self.end = end
+        self.item = item
+        self.words = words
+
+
+class RenderedMarkdown:
+    """A document rendered to markdown once, as a UTF-8 buffer with per-part byte offsets."""
+
+    def __init__(self, buffer: bytes, parts: List[RenderedPart]):
+        self.buffer = buffer
+        self.parts = parts
+        self._view = memoryview(buffer)
+
+    def slice(self, start: int, end: int) -> memoryview:
+        """Zero-copy view of a byte range of the buffer."""
+        return self._view[start:end]
+
+
+def render_markdown(doc: DoclingDocument) -> RenderedMarkdown:
+    """
+    Render a document to markdown in a single pass.
+    The buffer is identical to doc.export_to_markdown() encoded as UTF-8.
+    """
+    serializer = MarkdownDocSerializer(doc=doc)
+    chunks = []
+    parts = []
+    offset = 0
+
+    for part in serializer.get_parts():
+        if not part.text:
+            continue
+        if chunks:
+            offset += len(PART_DELIMITER)
+        data = part.text.encode("utf-8")
+        item = part.spans[0].item if part.spans else None
+        parts.append(RenderedPart(offset, offset + len(data), item, len(part.text.split())))
+        chunks.append(data)
+        offset += len(data)
+
+    return RenderedMarkdown(PART_DELIMITER.join(chunks), parts)
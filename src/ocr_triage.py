@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import List, Tuple
+import logging
+import pypdfium2
+import pypdfium2.raw as pdfium_c
+from docling_core.types.doc import DoclingDocument
+from converter_pool import get_converter_pool
+from sharding import merge_shards
+
+# A page has a usable text layer when it carries enough text and little of it is garbage
+MIN_TEXT_CHARS = 50
+MIN_PRINTABLE_RATIO = 0.9
+
+# Pages drawing this many vector paths (ruling lines, cell borders) may hold tables
+MIN_TABLE_PATHS = 20
+
+# (first page, last page, do_ocr, do_table_structure)
+TriageRange = Tuple[int, int, bool, bool]
+
+
+def _printable_ratio(text: str) -> float:
+    """Share of non-whitespace characters that are printable and not replacement glyphs."""
+    chars = [c for c in text if not c.isspace()]
+    if not chars:
+        return 0.0
+    good = sum(c.isprintable() and c != "�" for c in chars)
+    return good / len(chars)
+
+
+def classify_pages(path: Path) -> List[dict]:
+    """
+    Cheap pre-pass over a PDF that decides per page whether OCR is needed.
+    Pages with a usable text layer skip OCR; image-only pages and pages with garbled
+    text get OCR and table-structure analysis. Pages with many vector paths are
+    flagged as likely tables.
+    """
+    pdf = pypdfium2.PdfDocument(path)
+    classes = []
+    try:
+        for page_idx in range(len(pdf)):
+            page = pdf[page_idx]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+                paths = sum(1 for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH]))
+            finally:
+                textpage.close()
+                page.close()
+
+            chars = len(text.strip())
+            has_text_layer = (
+                chars >= MIN_TEXT_CHARS and _printable_ratio(text) >= MIN_PRINTABLE_RATIO
+            )
+            classes.append(
+                {
+                    "page": page_idx + 1,
+                    "chars": chars,
+                    "has_text_layer": has_text_layer,
+                    "needs_ocr": not has_text_layer,
+                    "needs_tables": not has_text_layer or paths >= MIN_TABLE_PATHS,
+                }
+            )
+    finally:
+        pdf.close()
+    return classes
+
+
+def plan_ranges(
+    classes: List[dict], do_table_structure: bool, triage_tables: bool
+) -> List[TriageRange]:
+    """Group consecutive pages that need the same pipeline settings into page ranges."""
+    ranges = []
+    for page in classes:
+        do_ocr = page["needs_ocr"]
+        do_tables = do_table_structure and (page["needs_tables"] or not triage_tables)
+        if ranges and ranges[-1][2:] == (do_ocr, do_tables) and ranges[-1][1] == page["page"] - 1:
+            first, _, _, _ = ranges[-1]
+            ranges[-1] = (first, page["page"], do_ocr, do_tables)
+        else:
+            ranges.append((page["page"], page["page"], do_ocr, do_tables))
+    return ranges
+
+
+def format_pages(pages: List[int]) -> str:
+    """Compact page list, e.g. [1, 2, 3, 7] -> '1-3, 7'."""
+    spans = []
+    for page in pages:
+        if spans and spans[-1][1] == page - 1:
+            spans[-1][1] = page
+        else:
+            spans.append([page, page])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in spans)
+
+
+def summarize(classes: List[dict], ranges: List[TriageRange]) -> dict:
+    """Classification counts for the statistics panel."""
+    return {
+        "text_pages": sum(page["has_text_layer"] for page in classes),
+        "ocr_pages": sum(page["needs_ocr"] for page in classes),
+        "ocr_page_list": format_pages([page["page"] for page in classes if page["needs_ocr"]]),
+        "table_pages": sum(last - first + 1 for first, last, _, tables in ranges if tables),
+        "ranges": len(ranges),
+    }
+
+
+def triage_pages(path: Path, pipeline_settings: dict) -> Tuple[List[TriageRange], dict]:
+    """
+    Classify the pages of a PDF and plan the page ranges to convert.
+    Returns (ranges, summary).
+    """
+    logger = logging.getLogger(__name__)
+    classes = classify_pages(path)
+    ranges = plan_ranges(
+        classes,
+        pipeline_settings["do_table_structure"],
+        pipeline_settings.get("triage_tables", False),
+    )
+    summary = summarize(classes, ranges)
+    logger.info(
+        "OCR triage for %s: %d pages with text layer, %d pages need OCR, %d page ranges",
+        path.name,
+        summary["text_pages"],
+        summary["ocr_pages"],
+        summary["ranges"],
+    )
+    return ranges, summary
+
+
+def range_settings(pipeline_settings: dict, triage_range: TriageRange) -> dict:
+    """Pipeline settings for converting one triaged page range."""
+    _, _, do_ocr, do_tables = triage_range
+    return dict(pipeline_settings, do_ocr=do_ocr, do_table_structure=do_tables)
+
+
+def convert_ranges(
+    path: Path, pipeline_settings: dict, ranges: List[TriageRange]
+) -> DoclingDocument:
+    """
+    Convert a PDF with OCR (and optionally table structure) enabled only on the page
+    ranges that need it, and merge the ranges back into one document.
+    """
+    logger = logging.getLogger(__name__)
+    pool = get_converter_pool()
+    range_docs = []
+    for triage_range in ranges:
+        first, last, do_ocr, do_tables = triage_range
+        logger.debug("Converting pages %d-%d (OCR: %s, tables: %s)", first, last, do_ocr, do_tables)
+        doc_converter = pool.get(range_settings(pipeline_settings, triage_range))
+        range_docs.append(doc_converter.convert(path, page_range=(first, last)).document)
+
+    return merge_shards(range_docs)
+
+
+def should_triage(path: Path, pipeline_settings: dict) -> bool:
+    """Triage applies to PDFs when OCR is enabled in automatic mode."""
+    return (
+        pipeline_settings["do_ocr"]
+        and pipeline_settings.get("ocr_auto", False)
+        and path.suffix.lower() == ".pdf"
+    )
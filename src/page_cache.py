@@ -0,0 +1,195 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import pypdfium2
+from docling.utils.utils import create_file_hash
+from docling_core.types.doc import ContentLayer, DocItem, DoclingDocument, RefItem
+from docling_core.types.doc.document import DocumentOrigin
+from conversion_cache import ConversionCache, settings_key
+from converter_pool import get_converter_pool
+from ocr_triage import TriageRange, range_settings
+from sharding import count_pdf_pages, merge_shards
+
+DEFAULT_CACHE_DIR = Path("cache") / "pages"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1GB
+
+# Size cap of the page cache in megabytes
+MAX_MB_ENV = "STUDY_TOOLS_PAGE_CACHE_MB"
+
+
+class PageCache(ConversionCache):
+    """
+    Disk-backed cache of single converted pages keyed by page content and the settings
+    the page was converted with. Entries are evicted least recently used first.
+    """
+
+    def make_key(self, fingerprint: str, pipeline_settings: dict) -> str:
+        digest = hashlib.sha256(fingerprint.encode())
+        digest.update(json.dumps(settings_key(pipeline_settings)).encode())
+        return digest.hexdigest()
+
+
+def page_fingerprints(path: Path) -> List[str]:
+    """
+    Hash the content of every page of a PDF.
+
+    The hash covers page geometry, the text layer, the position of every page object
+    and the raw data of embedded images, so it stays stable when other pages of the
+    file are added, removed or edited.
+    """
+    pdf = pypdfium2.PdfDocument(path)
+    fingerprints = []
+    try:
+        for page_idx in range(len(pdf)):
+            page = pdf[page_idx]
+            textpage = page.get_textpage()
+            try:
+                digest = hashlib.sha256(repr((page.get_size(), page.get_rotation())).encode())
+                digest.update(textpage.get_text_range().encode("utf-8", "surrogatepass"))
+                for obj in page.get_objects():
+                    digest.update(repr((obj.type, obj.get_bounds())).encode())
+                    if isinstance(obj, pypdfium2.PdfImage):
+                        digest.update(bytes(obj.get_data(decode_simple=False)))
+            finally:
+                textpage.close()
+                page.close()
+            fingerprints.append(digest.hexdigest())
+    finally:
+        pdf.close()
+    return fingerprints
+
+
+def split_pages(doc: DoclingDocument, first: int, last: int) -> List[DoclingDocument]:
+    """
+    Split the conversion of pages first..last into one document per page.
+
+    Top-level body items are grouped by the pages they appear on in a single walk, and
+    each page is then filtered from its own items only, instead of from the whole range.
+    """
+    page_children: Dict[int, List[RefItem]] = {page_no: [] for page_no in range(first, last + 1)}
+    for child_ref in doc.body.children:
+        page_nrs = {
+            prov.page_no
+            for item, _ in doc.iterate_items(
+                root=child_ref.resolve(doc),
+                traverse_pictures=True,
+                included_content_layers=set(ContentLayer),
+            )
+            if isinstance(item, DocItem)
+            for prov in item.prov
+        }
+        # Items spanning pages, such as lists, are filtered on each of their pages
+        for page_no in sorted(page_nrs & page_children.keys()):
+            page_children[page_no].append(child_ref)
+
+    page_docs = []
+    for page_no, children in page_children.items():
+        body = doc.body.model_copy(update={"children": children})
+        page_docs.append(doc.model_copy(update={"body": body}).filter(page_nrs={page_no}))
+    return page_docs
+
+
+def _missing_runs(pages: List[Optional[DoclingDocument]], page_settings: List[dict]):
+    """Group consecutive uncached pages with identical settings into (first, last) ranges."""
+    runs = []
+    for idx, page_doc in enumerate(pages):
+        if page_doc is not None:
+            continue
+        page_no = idx + 1
+        first = runs[-1][0] if runs else None
+        if runs and runs[-1][1] == page_no - 1 and page_settings[first - 1] == page_settings[idx]:
+            runs[-1][1] = page_no
+        else:
+            runs.append([page_no, page_no])
+    return [tuple(run) for run in runs]
+
+
+def convert_incremental(
+    path: Path, pipeline_settings: dict, ranges: Optional[List[TriageRange]] = None
+) -> Tuple[DoclingDocument, dict]:
+    """
+    Convert a PDF, reusing cached pages and converting only new or changed pages.
+
+    ranges optionally assigns OCR and table settings per page range (see ocr_triage);
+    by default every page uses pipeline_settings. Returns the merged document and
+    page cache counts.
+    """
+    logger = logging.getLogger(__name__)
+    cache = get_page_cache()
+
+    num_pages = count_pdf_pages(path)
+    ranges = ranges or [
+        (1, num_pages, pipeline_settings["do_ocr"], pipeline_settings["do_table_structure"])
+    ]
+    page_settings = [None] * num_pages
+    for triage_range in ranges:
+        first, last, _, _ = triage_range
+        settings = range_settings(pipeline_settings, triage_range)
+        for page_no in range(first, last + 1):
+            page_settings[page_no - 1] = settings
+
+    keys = [
+        cache.make_key(fingerprint, settings)
+        for fingerprint, settings in zip(page_fingerprints(path), page_settings)
+    ]
+    pages = [cache.get(key) for key in keys]
+    reused = sum(page_doc is not None for page_doc in pages)
+
+    runs = _missing_runs(pages, page_settings)
+    logger.info(
+        "Page cache for %s: reusing %d of %d pages, converting %d pages in %d ranges",
+        path.name,
+        reused,
+        num_pages,
+        num_pages - reused,
+        len(runs),
+    )
+    pool = get_converter_pool()
+    for first, last in runs:
+        doc_converter = pool.get(page_settings[first - 1])
+        run_doc = doc_converter.convert(path, page_range=(first, last)).document
+        for page_no, page_doc in enumerate(split_pages(run_doc, first, last), start=first):
+            cache.put(keys[page_no - 1], page_doc, evict=False)
+            pages[page_no - 1] = page_doc
+    if runs:
+        cache.evict()
+
+    # Concatenation renumbers pages in order, so pages that moved in a revision line up
+    doc = merge_shards(pages)
+    # Cached pages may come from an earlier upload under another name
+    doc.name = path.stem
+    doc.origin = DocumentOrigin(
+        mimetype="application/pdf", filename=path.name, binary_hash=create_file_hash(path)
+    )
+    stats = {
+        "pages": num_pages,
+        "reused_pages": reused,
+        "converted_pages": num_pages - reused,
+        "ranges": len(runs),
+    }
+    return doc, stats
+
+
+def use_page_cache(path: Path, pipeline_settings: dict) -> bool:
+    """The page cache applies to PDFs when enabled in the settings."""
+    return pipeline_settings.get("page_cache", False) and path.suffix.lower() == ".pdf"
+
+
+def max_bytes_from_env() -> int:
+    """Page cache size cap from the environment, falling back to 1GB if unset or invalid."""
+    try:
+        max_mb = int(os.environ.get(MAX_MB_ENV, ""))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+    return max_mb * 1024 * 1024 if max_mb > 0 else DEFAULT_MAX_BYTES
+
+
+_cache = PageCache(cache_dir=DEFAULT_CACHE_DIR, max_bytes=max_bytes_from_env())
+
+
+def get_page_cache() -> PageCache:
+    """Return the page cache shared by all sessions in this process."""
+    return _cache
@@ -0,0 +1,188 @@
+from pathlib import Path
+import logging
+import shutil
+from bundle import CHAPTER_MANIFEST, pack_directory
+from converter_pool import get_converter_pool
+from conversion_cache import get_conversion_cache
+from cpu_budget import get_cpu_budget
+from ingest import create_job_dir, remove_job_dir, spool_upload
+from instrumentation import StageTimer
+from markdown_render import render_markdown
+from ocr_triage import convert_ranges, should_triage, triage_pages
+from page_cache import convert_incremental, use_page_cache
+from processor import DocumentProcessor
+from search_index import get_search_index
+from sharding import convert_sharded, should_shard
+
+
+def setup_directories(doc_name: str, output_root: Path = Path("output")) -> Path:
+    """Create output directory structure for a document."""
+    output_dir = output_root / doc_name
+    (output_dir / "images").mkdir(parents=True, exist_ok=True)
+    (output_dir / "chapters").mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def process_document(
+    uploaded_file,
+    output_dir: Path,
+    pipeline_settings: dict,
+    timer: StageTimer = None,
+    output_root: Path = Path("output"),
+):
+    """
+    Process document and save results in the structured output directory.
+    Returns tuple of (status, main_path, chapters, stats), where chapters holds
+    (title, file_path) pairs.
+
+    Args:
+        uploaded_file: Uploaded file object, or a Path to a document already on disk
+        output_dir: Directory created by setup_directories
+        pipeline_settings: Conversion and chapter settings
+        timer: Optional timer to record stages in, so callers can follow progress
+        output_root: Library root that output_dir belongs to, holding the search index
+    """
+    logger = logging.getLogger(__name__)
+    timer = timer or StageTimer()
+    num_threads = pipeline_settings.get("num_threads") or get_cpu_budget().threads_for(1)
+    stats = {"stages": timer.spans, "num_threads": num_threads}
+    status = "Error"
+
+    job_dir = None
+    if isinstance(uploaded_file, Path):
+        # Documents already on disk are converted in place
+        temp_path = uploaded_file
+    else:
+        # Save uploaded file into its own temp directory
+        job_dir = create_job_dir()
+        with timer.span("upload_copy") as span:
+            temp_path = spool_upload(uploaded_file, job_dir)
+            span["bytes"] = temp_path.stat().st_size
+        logger.debug("Created temporary file at: %s", temp_path)
+
+    try:
+        # Initialize processor
+        search_index = get_search_index(output_root)
+        processor = DocumentProcessor(output_dir, timer, search_index)
+        logger.debug("Initialized DocumentProcessor with output directory: %s", output_dir)
+
+        # Reuse a previous conversion of the same file and settings if available
+        with timer.span("cache_lookup") as span:
+            conversion_cache = get_conversion_cache()
+            cache_key = conversion_cache.make_key(temp_path, pipeline_settings)
+            doc = conversion_cache.get(cache_key)
+            span["bytes"] = temp_path.stat().st_size
+            span["cache_hit"] = doc is not None
+
+        if doc is None:
+            logger.info("Starting document conversion")
+            if should_triage(temp_path, pipeline_settings):
+                # OCR only the pages without a usable text layer
+                with timer.span("convert", triaged=True) as span:
+                    ranges, stats["ocr_triage"] = triage_pages(temp_path, pipeline_settings)
+                    if use_page_cache(temp_path, pipeline_settings):
+                        doc, stats["page_cache"] = convert_incremental(
+                            temp_path, pipeline_settings, ranges
+                        )
+                        span["reused_pages"] = stats["page_cache"]["reused_pages"]
+                    else:
+                        doc = convert_ranges(temp_path, pipeline_settings, ranges)
+                    span["pages"] = doc.num_pages()
+                    span["ocr_pages"] = stats["ocr_triage"]["ocr_pages"]
+            elif should_shard(temp_path, pipeline_settings):
+                # Convert page ranges in parallel worker processes
+                with timer.span("convert", sharded=True) as span:
+                    doc = convert_sharded(temp_path, pipeline_settings)
+                    span["pages"] = doc.num_pages()
+            elif use_page_cache(temp_path, pipeline_settings):
+                # Convert only pages that changed since an earlier upload
+                with timer.span("convert", incremental=True) as span:
+                    doc, stats["page_cache"] = convert_incremental(temp_path, pipeline_settings)
+                    span["pages"] = doc.num_pages()
+                    span["reused_pages"] = stats["page_cache"]["reused_pages"]
+            else:
+                # Reuse a warm converter for these settings
+                with timer.span("converter_setup"):
+                    doc_converter = get_converter_pool().get(pipeline_settings)
+                with timer.span("convert") as span:
+                    result = doc_converter.convert(temp_path)
+                    doc = result.document
+                    span["pages"] = doc.num_pages()
+            logger.info("Document conversion completed")
+            with timer.span("cache_store"):
+                conversion_cache.put(cache_key, doc)
+
+        stats["pages"] = doc.num_pages()
+
+        # Process document
+        doc = processor.update_image_links(doc)
+        stats["images"] = processor.image_stats
+        chapters = []
+
+        # Render markdown once; the main file and all chapters are slices of this buffer
+        with timer.span("markdown_export", pages=stats["pages"]) as span:
+            rendered = render_markdown(doc)
+            span["bytes"] = len(rendered.buffer)
+
+        # Split into chapters if enabled
+        header = b""
+        if pipeline_settings["enable_chapters"]:
+            logger.debug("Starting chapter splitting process")
+            # Keep only titles, paths and running totals so chapter contents are released
+            chapter_words = 0
+            with timer.span("chapter_split", pages=stats["pages"]):
+                for title, _, path, word_count in processor.iter_chapters(
+                    doc,
+                    heading_level=pipeline_settings["heading_level"],
+                    min_words=pipeline_settings["min_words"],
+                    max_words=pipeline_settings["max_words"],
+                    rendered=rendered,
+                ):
+                    chapters.append((title, path))
+                    chapter_words += word_count
+            stats["chapters"] = len(chapters)
+            stats["chapter_words"] = chapter_words
+
+            # Save main markdown file with chapter links
+            logger.debug("Created %d chapters", len(chapters))
+            main_md = ["# " + temp_path.stem + "\n"]
+            main_md.append("## Chapters\n")
+
+            for title, path in chapters:
+                main_md.append(f"- [{title}](chapters/{path.name})")
+
+            header = ("\n".join(main_md) + "\n\n").encode("utf-8")
+        else:
+            # Just save the document without chapters
+            logger.debug("Chapter splitting disabled, saving single document")
+            # Drop the chapter list of an earlier run so the browser does not show it
+            (output_dir / CHAPTER_MANIFEST).unlink(missing_ok=True)
+            search_index.remove(output_dir)
+
+        with timer.span("write_output") as span:
+            main_path = output_dir / f"{temp_path.stem}.md"
+            with main_path.open("wb") as f:
+                f.write(header)
+                f.write(rendered.buffer)
+            span["bytes"] = main_path.stat().st_size
+
+        if pipeline_settings.get("packed_output"):
+            # Replace the directory tree with a single indexed bundle
+            with timer.span("pack") as span:
+                main_path = pack_directory(output_dir, main_path, chapters)
+                shutil.rmtree(output_dir)
+                search_index.mark_packed(output_dir, main_path)
+                span["bytes"] = main_path.stat().st_size
+        status = "Success"
+        return status, main_path, chapters, stats
+
+    except Exception as e:
+        logger.exception("Document processing failed")
+        status = f"Error: {str(e)}"
+        return status, None, [], stats
+    finally:
+        # Cleanup
+        if job_dir is not None:
+            remove_job_dir(job_dir)
+            logger.debug("Cleaned up temporary files")
+        timer.log_records(document=temp_path.name, status=status, num_threads=stats["num_threads"])
@@ -1,17 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote
+import base64
+import hashlib
 import logging
-from docling.document_converter import DocumentConverter
-from docling_core.types.doc import DoclingDocument
+import mimetypes
+from docling_core.types.doc import DoclingDocument, ImageRef, PictureItem
+from pydantic import AnyUrl
 from chapter_splitter import ChapterSplitter
+from image_export import file_digest, link_or_copy
+from instrumentation import StageTimer
+from markdown_render import RenderedMarkdown
+from search_index import SearchIndex
+
+IMAGE_EXPORT_WORKERS = 8
+
+# An image file on disk, or the encoded bytes of an embedded image
+ImageSource = Optional[Union[Path, bytes]]
 
 
 class DocumentProcessor:
-    def __init__(self, output_dir: Path):
+    def __init__(
+        self,
+        output_dir: Path,
+        timer: StageTimer = None,
+        search_index: Optional[SearchIndex] = None,
+    ):
         self.output_dir = output_dir
+        self.timer = timer or StageTimer()
         self.images_dir = output_dir / "images"
         self.chapters_dir = output_dir / "chapters"
-        self.chapter_splitter = ChapterSplitter(output_dir)
+        self.chapter_splitter = ChapterSplitter(output_dir, search_index)
+        self.image_stats = {}
         self.logger = logging.getLogger(__name__)
 
     def split_into_chapters(
@@ -32,41 +53,151 @@ class DocumentProcessor:
             max_words: Maximum words per chapter (chapters above this are split further)
         """
         self.logger.debug(
-            f"Splitting document into chapters. Heading level: {heading_level}, "
-            f"Min words: {min_words}, Max words: {max_words}"
+            "Splitting document into chapters. Heading level: %d, Min words: %d, Max words: %d",
+            heading_level,
+            min_words,
+            max_words,
         )
         result = self.chapter_splitter.split_document(doc, heading_level, min_words, max_words)
-        self.logger.info(f"Split document into {len(result)} chapters")
+        self.logger.info("Split document into %d chapters", len(result))
         return result
 
+    def iter_chapters(
+        self,
+        doc: DoclingDocument,
+        heading_level: int = 1,
+        min_words: int = 500,
+        max_words: int = 8000,
+        rendered: Optional[RenderedMarkdown] = None,
+    ) -> Iterator[Tuple[str, memoryview, Path, int]]:
+        """
+        Stream chapters to disk one at a time.
+        Yields tuples containing (title, content, file_path, word_count).
+        Pass rendered to cut chapters from markdown that was already rendered.
+        """
+        self.logger.debug(
+            "Streaming document chapters. Heading level: %d, Min words: %d, Max words: %d",
+            heading_level,
+            min_words,
+            max_words,
+        )
+        return self.chapter_splitter.iter_chapters(
+            doc, heading_level, min_words, max_words, rendered
+        )
+
     def update_image_links(self, doc: DoclingDocument) -> DoclingDocument:
-        """Update image links to use relative paths."""
-        self.logger.debug(f"Processing {len(doc.pictures)} images")
-        for idx, picture in enumerate(doc.pictures):
-            # Copy image to images directory
-            # Access the image path using the correct attribute
-            if hasattr(picture, "source_path") and picture.source_path:
-                source_path = Path(picture.source_path)
-            elif hasattr(picture, "path") and picture.path:
-                source_path = Path(picture.path)
-            else:
-                self.logger.warning(f"Image {idx} has no valid source path, skipping")
-                continue
-
-            new_filename = f"image_{idx}{source_path.suffix}"
-            new_path = self.images_dir / new_filename
-
-            if source_path.exists():
-                self.logger.debug(f"Copying image {idx} from {source_path} to {new_path}")
-                new_path.parent.mkdir(parents=True, exist_ok=True)
-                new_path.write_bytes(source_path.read_bytes())
-
-                # Update path in document using corresponding attribute
-                if hasattr(picture, "source_path"):
-                    picture.source_path = f"images/{new_filename}"
-                    self.logger.debug(f"Updated source_path for image {idx}")
-                if hasattr(picture, "path"):
-                    picture.path = f"images/{new_filename}"
-                    self.logger.debug(f"Updated path for image {idx}")
+        """
+        Export picture images into images/ and point each picture's image URI at its file.
 
+        Identical images are exported once and shared by every picture that shows them.
+        Embedded images are decoded and written; images already on disk are hardlinked,
+        reflinked or kernel-copied. Both run on a bounded thread pool, and the export
+        metrics are stored in image_stats.
+        """
+        with self.timer.span("image_links") as span:
+            doc = self._update_image_links(doc)
+            span["bytes"] = self.image_stats["bytes_copied"]
+        return doc
+
+    def _image_source(self, doc: DoclingDocument, picture: PictureItem) -> ImageSource:
+        """
+        Return the file holding a picture's image, or its encoded bytes when the image is
+        embedded in the document. Returns None for pictures without a readable image.
+        """
+        if picture.image is None:
+            # Crop the picture from its page image, where the document kept page images
+            pil_image = picture.get_image(doc)
+            if pil_image is None:
+                return None
+            page = doc.pages.get(picture.prov[0].page_no)
+            dpi = page.image.dpi if page is not None and page.image is not None else 72
+            picture.image = ImageRef.from_pil(pil_image, dpi=dpi)
+
+        uri = picture.image.uri
+        if isinstance(uri, AnyUrl):
+            if uri.scheme == "data":
+                # docling embeds generated picture images as base64 data URIs
+                return base64.b64decode(str(uri).split(",", 1)[1])
+            if uri.scheme != "file":
+                return None
+            uri = Path(unquote(uri.path))
+        return uri if uri.is_file() else None
+
+    def _export_image(self, source: Union[Path, bytes], target_path: Path) -> str:
+        if isinstance(source, Path):
+            return link_or_copy(source, target_path)
+        target_path.write_bytes(source)
+        return "write"
+
+    def _update_image_links(self, doc: DoclingDocument) -> DoclingDocument:
+        self.logger.debug("Processing %d images", len(doc.pictures))
+
+        with ThreadPoolExecutor(max_workers=IMAGE_EXPORT_WORKERS) as executor:
+            with self.timer.span("image_hash"):
+                found = list(
+                    executor.map(lambda picture: self._image_source(doc, picture), doc.pictures)
+                )
+                # Pictures whose image can be read, with their position in the document
+                sources = [
+                    (idx, picture, source)
+                    for idx, (picture, source) in enumerate(zip(doc.pictures, found))
+                    if source is not None
+                ]
+                digests = list(
+                    executor.map(
+                        lambda source: (
+                            file_digest(source)
+                            if isinstance(source, Path)
+                            else hashlib.sha256(source).hexdigest()
+                        ),
+                        [source for _, _, source in sources],
+                    )
+                )
+
+            missing = len(doc.pictures) - len(sources)
+            if missing:
+                self.logger.warning("%d images have no readable image data, skipping", missing)
+
+            # Name each unique image after its first occurrence
+            exports = {}
+            filenames = []
+            for (idx, picture, source), digest in zip(sources, digests):
+                if digest not in exports:
+                    if isinstance(source, Path):
+                        suffix = source.suffix
+                    else:
+                        suffix = mimetypes.guess_extension(picture.image.mimetype) or ".png"
+                    exports[digest] = (source, f"image_{idx}{suffix}")
+                filenames.append(exports[digest][1])
+
+            self.images_dir.mkdir(parents=True, exist_ok=True)
+            with self.timer.span("image_export"):
+                methods = list(
+                    executor.map(
+                        lambda export: self._export_image(export[0], self.images_dir / export[1]),
+                        exports.values(),
+                    )
+                )
+
+        for (_, picture, _), new_filename in zip(sources, filenames):
+            picture.image.uri = Path("images") / new_filename
+
+        bytes_copied = sum(
+            source.stat().st_size if isinstance(source, Path) else len(source)
+            for (source, _), method in zip(exports.values(), methods)
+            if method in ("copy", "write")
+        )
+        self.image_stats = {
+            "images": len(sources),
+            "unique_images": len(exports),
+            "linked_images": sum(method in ("hardlink", "reflink") for method in methods),
+            "bytes_copied": bytes_copied,
+            "dedup_ratio": len(sources) / len(exports) if exports else 1.0,
+        }
+        self.logger.info(
+            "Exported %d images as %d files (%d bytes copied)",
+            len(sources),
+            len(exports),
+            bytes_copied,
+        )
         return doc
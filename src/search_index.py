@@ -0,0 +1,238 @@
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Sequence
+import logging
+import os
+import re
+import sqlite3
+
+DEFAULT_OUTPUT_ROOT = Path("output")
+INDEX_NAME = "search.sqlite"
+DEFAULT_LIMIT = 20
+SNIPPET_TOKENS = 24
+
+# Location of the library search index, instead of search.sqlite in the output root
+INDEX_PATH_ENV = "STUDY_TOOLS_SEARCH_INDEX"
+
+HEADING_PATH_SEPARATOR = " > "
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chapter_meta (
+    id INTEGER PRIMARY KEY,
+    doc_dir TEXT NOT NULL,
+    document TEXT NOT NULL,
+    title TEXT NOT NULL,
+    heading_path TEXT NOT NULL,
+    member TEXT NOT NULL,
+    bundle TEXT
+);
+CREATE INDEX IF NOT EXISTS chapter_meta_doc_dir ON chapter_meta (doc_dir);
+CREATE VIRTUAL TABLE IF NOT EXISTS chapter_text USING fts5(
+    document, title, heading_path, content, tokenize = 'porter unicode61'
+);
+"""
+
+# Column weights for bm25(): document, title, heading path, content
+RANK_WEIGHTS = (2.0, 8.0, 4.0, 1.0)
+
+
+def match_query(text: str) -> str:
+    """
+    Turn free text from the search box into an FTS5 query: every word must match,
+    and the last word also matches as a prefix so results update while typing.
+    """
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class IndexWriter:
+    """Collects the chapters of one document, to be indexed together in one transaction."""
+
+    def __init__(self, doc_dir: Path):
+        self.doc_dir = doc_dir
+        self.document = doc_dir.name
+        self.rows = []
+
+    @property
+    def chapters(self) -> int:
+        return len(self.rows)
+
+    def add(self, title: str, heading_path: Sequence[str], file_path: Path, content: str):
+        path_text = HEADING_PATH_SEPARATOR.join(heading_path)
+        # Chapters are stored by their path inside the document, as in a packed bundle
+        member = file_path.relative_to(self.doc_dir).as_posix()
+        self.rows.append((title, path_text, member, content))
+
+    def write(self, conn: sqlite3.Connection, doc_key: str):
+        for title, path_text, member, content in self.rows:
+            cursor = conn.execute(
+                "INSERT INTO chapter_meta (doc_dir, document, title, heading_path, member) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (doc_key, self.document, title, path_text, member),
+            )
+            conn.execute(
+                "INSERT INTO chapter_text (rowid, document, title, heading_path, content) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, self.document, title, path_text, content),
+            )
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over the chapters of every processed document.
+
+    Each document is re-indexed as a whole when it is split again, replacing its
+    previous chapters; other documents are left untouched. Document paths are stored
+    relative to the directory of the index, so the library can be moved as a whole.
+    """
+
+    def __init__(self, path: Path = DEFAULT_OUTPUT_ROOT / INDEX_NAME):
+        self.path = path
+        self.root = path.parent
+        self.logger = logging.getLogger(__name__)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Writers in job threads and batch processes wait for each other instead of failing
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _key(self, path: Path) -> str:
+        """Path as stored in the index: relative to the index directory where possible."""
+        resolved = path.resolve()
+        try:
+            return resolved.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(resolved)
+
+    @contextmanager
+    def writer(self, doc_dir: Path) -> Iterator[IndexWriter]:
+        """
+        Replace the indexed chapters of the document in doc_dir. Chapters added to the
+        writer become searchable together when the block exits without an error.
+        """
+        writer = IndexWriter(doc_dir)
+        yield writer
+
+        # Write in one short transaction after the last chapter, so documents split at the
+        # same time by other jobs or batch workers only wait for each other's inserts
+        conn = self._connect()
+        try:
+            with conn:
+                doc_key = self._key(doc_dir)
+                self._delete(conn, doc_key)
+                writer.write(conn, doc_key)
+        finally:
+            conn.close()
+        self.logger.info("Indexed %d chapters of %s", writer.chapters, writer.document)
+
+    def _delete(self, conn: sqlite3.Connection, doc_key: str):
+        conn.execute(
+            "DELETE FROM chapter_text WHERE rowid IN "
+            "(SELECT id FROM chapter_meta WHERE doc_dir = ?)",
+            (doc_key,),
+        )
+        conn.execute("DELETE FROM chapter_meta WHERE doc_dir = ?", (doc_key,))
+
+    def remove(self, doc_dir: Path):
+        """Drop the indexed chapters of a document, e.g. when it is saved without chapters."""
+        if not self.path.exists():
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                self._delete(conn, self._key(doc_dir))
+        finally:
+            conn.close()
+
+    def mark_packed(self, doc_dir: Path, bundle: Path):
+        """Record that the chapters of doc_dir now live in a packed bundle."""
+        if not self.path.exists():
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE chapter_meta SET bundle = ? WHERE doc_dir = ?",
+                    (self._key(bundle), self._key(doc_dir)),
+                )
+        finally:
+            conn.close()
+
+    def search(self, text: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        """
+        Return the best matching chapters for free text, best first, with snippets.
+        member is the chapter's path inside its document; file_path is the chapter file,
+        or the bundle holding it for packed documents (also given as bundle).
+        """
+        query = match_query(text)
+        if not query or not self.path.exists():
+            return []
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT m.document, m.title, m.heading_path, m.doc_dir, m.member, m.bundle, "
+                f"snippet(chapter_text, 3, '**', '**', ' … ', {SNIPPET_TOKENS}), "
+                "bm25(chapter_text, ?, ?, ?, ?) AS score "
+                "FROM chapter_text JOIN chapter_meta m ON m.id = chapter_text.rowid "
+                "WHERE chapter_text MATCH ? ORDER BY score LIMIT ?",
+                (*RANK_WEIGHTS, query, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {
+                "document": document,
+                "title": title,
+                "heading_path": heading_path,
+                "member": member,
+                "bundle": self.root / bundle if bundle else None,
+                "file_path": self.root / bundle if bundle else self.root / doc_dir / member,
+                "snippet": snippet,
+                "score": -score,
+            }
+            for document, title, heading_path, doc_dir, member, bundle, snippet, score in rows
+        ]
+
+    def stats(self) -> dict:
+        """Number of indexed documents and chapters."""
+        if not self.path.exists():
+            return {"documents": 0, "chapters": 0}
+        conn = self._connect()
+        try:
+            documents, chapters = conn.execute(
+                "SELECT COUNT(DISTINCT doc_dir), COUNT(*) FROM chapter_meta"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"documents": documents, "chapters": chapters}
+
+
+_indexes: Dict[Path, SearchIndex] = {}
+_indexes_lock = Lock()
+
+
+def index_path(output_root: Path = DEFAULT_OUTPUT_ROOT) -> Path:
+    """Location of the search index for the library under output_root."""
+    override = os.environ.get(INDEX_PATH_ENV)
+    return Path(override) if override else output_root / INDEX_NAME
+
+
+def get_search_index(output_root: Path = DEFAULT_OUTPUT_ROOT) -> SearchIndex:
+    """Return the search index of the library under output_root, shared in this process."""
+    path = index_path(output_root)
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = SearchIndex(path)
+        return _indexes[path]
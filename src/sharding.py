@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from threading import Lock
+from typing import List, Optional, Tuple
+import logging
+import pypdfium2
+from docling_core.types.doc import DoclingDocument
+from cpu_budget import apply_thread_limits, available_cores
+from converter_pool import get_converter_pool
+
+PageRange = Tuple[int, int]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = Lock()
+
+
+def count_pdf_pages(path: Path) -> int:
+    """Count pages without running the conversion pipeline."""
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def plan_shards(num_pages: int, shard_pages: int) -> List[PageRange]:
+    """Split 1..num_pages into consecutive inclusive page ranges of at most shard_pages."""
+    return [
+        (start, min(start + shard_pages - 1, num_pages))
+        for start in range(1, num_pages + 1, shard_pages)
+    ]
+
+
+def convert_shard(path: Path, page_range: PageRange, pipeline_settings: dict) -> DoclingDocument:
+    """Convert one page range inside a worker process, reusing the worker's warm converter."""
+    apply_thread_limits(pipeline_settings["num_threads"])
+    pool = get_converter_pool()
+    pool.num_threads = pipeline_settings["num_threads"]
+    return pool.get(pipeline_settings).convert(path, page_range=page_range).document
+
+
+def merge_shards(shard_docs: List[DoclingDocument]) -> DoclingDocument:
+    """
+    Merge per-shard documents in page order into one document.
+
+    Shards keep their original page numbers, so concatenating consecutive shards
+    leaves page numbers untouched while body order and picture order follow the
+    shard order, matching an unsharded conversion.
+    """
+    merged = DoclingDocument.concatenate(shard_docs)
+    merged.origin = shard_docs[0].origin
+    return merged
+
+
+def get_shard_executor(workers: int) -> ProcessPoolExecutor:
+    """Return a process pool shared across documents so shard workers stay warm."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # Spawn keeps torch and OCR runtimes from inheriting forked parent state
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _executor_workers = workers
+        return _executor
+
+
+def shard_workers(pipeline_settings: dict) -> int:
+    """Number of shard worker processes to use for these settings."""
+    return max(1, pipeline_settings.get("shard_workers") or available_cores() // 4)
+
+
+def should_shard(path: Path, pipeline_settings: dict) -> bool:
+    """Sharding is opt-in and only applies to PDFs longer than one shard."""
+    shard_pages = pipeline_settings.get("shard_pages", 0)
+    if not shard_pages or path.suffix.lower() != ".pdf":
+        return False
+    return count_pdf_pages(path) > shard_pages
+
+
+def convert_sharded(path: Path, pipeline_settings: dict) -> DoclingDocument:
+    """Convert a PDF by converting page shards in parallel worker processes and merging them."""
+    logger = logging.getLogger(__name__)
+    shards = plan_shards(count_pdf_pages(path), pipeline_settings["shard_pages"])
+    workers = shard_workers(pipeline_settings)
+
+    # Split the job's thread budget between workers so shards don't oversubscribe the cores
+    num_threads = pipeline_settings.get("num_threads") or available_cores()
+    shard_settings = dict(pipeline_settings)
+    shard_settings["num_threads"] = max(1, num_threads // workers)
+
+    logger.info("Converting %s as %d shards on %d workers", path.name, len(shards), workers)
+    executor = get_shard_executor(workers)
+    futures = [
+        executor.submit(convert_shard, path.resolve(), page_range, shard_settings)
+        for page_range in shards
+    ]
+    shard_docs = [future.result() for future in futures]
+    logger.info("Merging %d shards", len(shard_docs))
+    return merge_shards(shard_docs)
@@ -0,0 +1,34 @@
+from pathlib import Path
+import json
+import run
+
+# Cases that need neither docling nor streamlit
+DOCLING_FREE_CASES = ["split_document", "update_image_links", "export_to_markdown"]
+TINY = ["--pages", "4", "--images", "6", "--unique-images", "2", "--repeat", "1"]
+
+
+def test_docling_free_cases_record_and_compare(tmp_path: Path) -> None:
+    output = tmp_path / "bench.json"
+
+    assert run.main(["--cases", *DOCLING_FREE_CASES, *TINY, "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    assert sorted(report["results"]) == sorted(DOCLING_FREE_CASES)
+    assert all(result["seconds"] > 0 for result in report["results"].values())
+    # Thresholds are generous; this only checks that a baseline comparison runs
+    assert (
+        run.main(
+            [
+                "--cases",
+                *DOCLING_FREE_CASES,
+                *TINY,
+                "--baseline",
+                str(output),
+                "--time-threshold",
+                "1000",
+                "--memory-threshold",
+                "1000",
+            ]
+        )
+        == 0
+    )
@@ -0,0 +1,99 @@
+from pathlib import Path
+import json
+import zipfile
+import pytest
+from bundle import (
+    CHAPTER_MANIFEST,
+    TOC_NAME,
+    BundleReader,
+    bundle_path,
+    export_bundle,
+    pack_directory,
+)
+
+CHAPTERS = {
+    "01_introduction.md": "# Introduction\n\nFirst chapter.",
+    # Non-ASCII names are stored as UTF-8 and lengthen the local header
+    "02_größenordnung_行列.md": "# Größenordnung\n\nZweites Kapitel: 行列.",
+}
+IMAGES = {"image_1.png": b"\x89PNG first", "image_2.png": bytes(range(256)) * 64}
+
+
+@pytest.fixture
+def output_dir(tmp_path: Path) -> Path:
+    output_dir = tmp_path / "output" / "lecture"
+    (output_dir / "chapters").mkdir(parents=True)
+    (output_dir / "images").mkdir()
+    for name, content in CHAPTERS.items():
+        (output_dir / "chapters" / name).write_text(content, encoding="utf-8")
+    for name, data in IMAGES.items():
+        (output_dir / "images" / name).write_bytes(data)
+    (output_dir / "lecture.md").write_text("# lecture\n\n## Chapters\n", encoding="utf-8")
+    manifest = [
+        {"title": name[3:-3], "path": f"chapters/{name}", "words": len(content.split())}
+        for name, content in CHAPTERS.items()
+    ]
+    (output_dir / CHAPTER_MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    return output_dir
+
+
+def pack(output_dir: Path) -> Path:
+    chapters = [(name[3:-3], output_dir / "chapters" / name) for name in CHAPTERS]
+    return pack_directory(output_dir, output_dir / "lecture.md", chapters)
+
+
+def test_reader_returns_every_member_unchanged(output_dir: Path) -> None:
+    target = pack(output_dir)
+
+    assert target == bundle_path(output_dir)
+    with BundleReader(target) as reader:
+        assert reader.document == "lecture"
+        assert reader.main_markdown() == "# lecture\n\n## Chapters\n"
+        assert [chapter["path"] for chapter in reader.chapters] == [
+            f"chapters/{name}" for name in CHAPTERS
+        ]
+        for idx, content in enumerate(CHAPTERS.values()):
+            assert reader.chapter(idx) == content
+        assert reader.images == [f"images/{name}" for name in IMAGES]
+        for name, data in IMAGES.items():
+            view = reader.read(f"images/{name}")
+            assert bytes(view) == data
+            view.release()
+        with pytest.raises(KeyError):
+            reader.read("chapters/missing.md")
+
+
+def test_compressed_members_are_read_through_zipfile(output_dir: Path, tmp_path: Path) -> None:
+    target = pack(output_dir)
+    recompressed = tmp_path / "recompressed.docpack"
+    with zipfile.ZipFile(target) as src, zipfile.ZipFile(recompressed, "w") as dst:
+        for info in src.infolist():
+            dst.writestr(info.filename, src.read(info), compress_type=zipfile.ZIP_DEFLATED)
+
+    with BundleReader(recompressed) as reader:
+        assert reader.chapter(1) == CHAPTERS["02_größenordnung_行列.md"]
+
+
+def test_export_restores_the_folder_layout(output_dir: Path, tmp_path: Path) -> None:
+    target = pack(output_dir)
+
+    exported = export_bundle(target, tmp_path / "restored")
+
+    assert exported == tmp_path / "restored" / "lecture"
+    for name, content in CHAPTERS.items():
+        assert (exported / "chapters" / name).read_text(encoding="utf-8") == content
+    for name, data in IMAGES.items():
+        assert (exported / "images" / name).read_bytes() == data
+    assert (exported / "lecture.md").read_bytes() == (output_dir / "lecture.md").read_bytes()
+    assert not (exported / TOC_NAME).exists()
+
+
+def test_export_refuses_members_outside_the_document(tmp_path: Path) -> None:
+    target = tmp_path / "evil.docpack"
+    with zipfile.ZipFile(target, "w") as archive:
+        archive.writestr(TOC_NAME, json.dumps({"document": "evil"}))
+        archive.writestr("../outside.md", "escaped")
+
+    with pytest.raises(ValueError):
+        export_bundle(target, tmp_path / "restored")
+    assert not (tmp_path / "restored" / "outside.md").exists()
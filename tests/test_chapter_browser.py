@@ -0,0 +1,64 @@
+from pathlib import Path
+import json
+from bundle import CHAPTER_MANIFEST, pack_directory
+from chapter_browser import DocumentView, document_label, list_documents, paginate
+
+
+def make_output(output_dir: Path, chapters: dict) -> Path:
+    (output_dir / "chapters").mkdir(parents=True)
+    (output_dir / "images").mkdir()
+    links = [f"- [{title}](chapters/{name})" for name, title in chapters.items()]
+    header = "\n".join([f"# {output_dir.name}\n", "## Chapters\n", *links])
+    (output_dir / f"{output_dir.name}.md").write_text(f"{header}\n\nbody", encoding="utf-8")
+    for name, title in chapters.items():
+        (output_dir / "chapters" / name).write_text(f"# {title}", encoding="utf-8")
+    return output_dir
+
+
+def test_documents_are_found_below_nested_folders(tmp_path: Path) -> None:
+    # Batch output mirrors the input tree: course.pdf and course/lecture1.pdf
+    make_output(tmp_path / "course", {})
+    make_output(tmp_path / "course" / "lecture1", {})
+    pack_directory(
+        make_output(tmp_path / "course" / "week2" / "lecture2", {}),
+        tmp_path / "course" / "week2" / "lecture2" / "lecture2.md",
+        [],
+    )
+    # A folder named like a document inside a document's images is not a document
+    make_output(tmp_path / "course" / "images", {})
+    (tmp_path / "search.sqlite").write_bytes(b"")
+
+    documents = list_documents(tmp_path)
+
+    assert [document_label(path, tmp_path) for path in documents] == [
+        "course",
+        "course/lecture1",
+        "course/week2/lecture2",
+        "course/week2/lecture2 (packed)",
+    ]
+
+
+def test_manifest_is_preferred_over_header_links(tmp_path: Path) -> None:
+    output_dir = make_output(tmp_path / "doc", {"01_a.md": "A", "02_b.md": "B"})
+    with DocumentView(output_dir) as view:
+        assert [entry["title"] for entry in view.entries()] == ["A", "B"]
+
+    manifest = [{"title": "B", "path": "chapters/02_b.md", "words": 2}]
+    (output_dir / CHAPTER_MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    with DocumentView(output_dir) as view:
+        assert view.entries() == manifest
+        assert view.read_text("chapters/02_b.md") == "# B"
+
+
+def test_documents_without_chapters_are_browsed_whole(tmp_path: Path) -> None:
+    output_dir = make_output(tmp_path / "doc", {})
+    with DocumentView(output_dir) as view:
+        assert view.entries() == [{"title": "doc", "path": "doc.md"}]
+
+
+def test_paginate_splits_at_paragraphs() -> None:
+    paragraphs = [" ".join(["word"] * 40) for _ in range(5)]
+
+    pages = paginate("\n\n".join(paragraphs), page_words=100)
+
+    assert [len(page.split()) for page in pages] == [80, 80, 40]
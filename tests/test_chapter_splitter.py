@@ -0,0 +1,157 @@
+from pathlib import Path
+import json
+import pytest
+from docling_core.types.doc import DocItemLabel, DoclingDocument
+from chapter_splitter import INTRODUCTION_TITLE, ChapterSplitter
+from markdown_render import render_markdown
+from synthetic import make_document
+
+# Every synthetic section is a 3-word heading ("# Section 1") and its paragraphs
+SECTION_WORDS = 250
+HEADING_WORDS = 3
+
+
+def split(tmp_path: Path, doc: DoclingDocument, **limits: int) -> list:
+    splitter = ChapterSplitter(tmp_path)
+    return list(splitter.iter_chapters(doc, **limits))
+
+
+def titles(chapters: list) -> list:
+    return [title for title, *_ in chapters]
+
+
+def section_text(markdown: str, title: str) -> str:
+    """Markdown from a heading up to the next heading of any level."""
+    parts = markdown.split("\n\n")
+    start = next(
+        idx for idx, part in enumerate(parts) if part.startswith("#") and part.endswith(title)
+    )
+    end = next(
+        (idx for idx in range(start + 1, len(parts)) if parts[idx].startswith("#")), len(parts)
+    )
+    return "\n\n".join(parts[start:end])
+
+
+def test_chapters_are_slices_of_the_document_markdown(tmp_path: Path) -> None:
+    doc = make_document(pages=4, heading_depth=1, words_per_section=SECTION_WORDS, images=0)
+    markdown = doc.export_to_markdown()
+
+    chapters = split(tmp_path, doc, min_words=10, max_words=1000)
+
+    assert titles(chapters) == [f"Section {n}" for n in range(1, 9)]
+    for title, content, path, word_count in chapters:
+        expected = section_text(markdown, title)
+        assert str(content, "utf-8") == expected
+        assert path.read_text(encoding="utf-8") == expected
+        assert word_count == len(expected.split()) == SECTION_WORDS + HEADING_WORDS
+    # Chapters within the limits cover the whole document
+    assert "\n\n".join(str(content, "utf-8") for _, content, *_ in chapters) == markdown
+
+
+def test_content_before_first_heading_is_the_introduction(tmp_path: Path) -> None:
+    doc = DoclingDocument(name="intro")
+    doc.add_text(label=DocItemLabel.TEXT, text=" ".join(["preface"] * 50))
+    doc.add_title(text="Chapter One")
+    doc.add_text(label=DocItemLabel.TEXT, text=" ".join(["body"] * 50))
+
+    chapters = split(tmp_path, doc, min_words=10, max_words=1000)
+
+    assert titles(chapters) == [INTRODUCTION_TITLE, "Chapter One"]
+    assert str(chapters[0][1], "utf-8") == " ".join(["preface"] * 50)
+
+
+def test_subheadings_before_first_target_heading_join_the_introduction(tmp_path: Path) -> None:
+    doc = DoclingDocument(name="intro")
+    doc.add_heading(text="Preface", level=2)
+    doc.add_text(label=DocItemLabel.TEXT, text=" ".join(["preface"] * 50))
+    doc.add_heading(text="Chapter One", level=1)
+    doc.add_text(label=DocItemLabel.TEXT, text=" ".join(["body"] * 50))
+
+    splitter = ChapterSplitter(tmp_path)
+    index = splitter.build_index(render_markdown(doc), heading_level=2)
+
+    assert [node.title for node in index.chapters] == [INTRODUCTION_TITLE, "Chapter One"]
+    assert [child.title for child in index.chapters[0].children] == ["Preface"]
+
+
+def test_oversized_chapters_split_below_the_next_level(tmp_path: Path) -> None:
+    # Section 1 (H1) > Section 2 (H2) > Section 3 (H3), repeated per page
+    doc = make_document(pages=2, heading_depth=3, words_per_section=SECTION_WORDS, images=0)
+    splitter = ChapterSplitter(tmp_path)
+    index = splitter.build_index(render_markdown(doc), heading_level=1)
+    assert [node.title for node in index.chapters] == ["Section 1", "Section 4"]
+    assert [child.title for child in index.chapters[0].children] == ["Section 2"]
+    assert [child.title for child in index.chapters[0].children[0].children] == ["Section 3"]
+
+    # Each section fits, but no heading together with its subheadings does
+    chapters = list(
+        splitter._resolve(index, index.chapters[0], min_words=10, max_words=SECTION_WORDS + 10)
+    )
+
+    assert [(title, path) for title, _, _, path in chapters] == [
+        ("Section 1", ("Section 1",)),
+        ("Section 2", ("Section 1", "Section 2")),
+        ("Section 3", ("Section 1", "Section 2", "Section 3")),
+    ]
+    assert splitter.split_stats["split"] == 2
+    assert splitter.split_stats["split_by_paragraphs"] == 0
+
+
+def test_chapters_without_subheadings_split_by_paragraphs(tmp_path: Path) -> None:
+    doc = make_document(pages=1, heading_depth=1, words_per_section=1000, images=0)
+
+    chapters = split(tmp_path, doc, min_words=10, max_words=300)
+
+    # 1000 words in paragraphs of 120: two paragraphs (plus the heading) per part
+    assert titles(chapters)[:3] == [
+        "Section 1 (Part 1)",
+        "Section 1 (Part 2)",
+        "Section 1 (Part 3)",
+    ]
+    assert all(word_count <= 300 for *_, word_count in chapters)
+
+
+def test_paragraph_parts_below_min_words_are_dropped(tmp_path: Path) -> None:
+    # Paragraphs of 120, 120 and 10 words: the last one becomes a part of its own
+    doc = make_document(pages=1, heading_depth=1, words_per_section=SECTION_WORDS, images=0)
+    splitter = ChapterSplitter(tmp_path)
+    index = splitter.build_index(render_markdown(doc), heading_level=1)
+
+    chapters = list(splitter._resolve(index, index.chapters[0], min_words=50, max_words=125))
+
+    assert [title for title, *_ in chapters] == ["Section 1 (Part 1)", "Section 1 (Part 2)"]
+
+
+@pytest.mark.parametrize(
+    ("min_words", "max_words", "expected"),
+    [
+        # Exactly min_words is kept, one more is skipped
+        (SECTION_WORDS + HEADING_WORDS, 1000, ["Section 1", "Section 2"]),
+        (SECTION_WORDS + HEADING_WORDS + 1, 1000, []),
+        # Exactly max_words is not split, one less is
+        (10, SECTION_WORDS + HEADING_WORDS, ["Section 1", "Section 2"]),
+        (10, SECTION_WORDS + HEADING_WORDS - 1, ["Section 1 (Part 1)", "Section 1 (Part 2)"]),
+    ],
+)
+def test_word_limits_are_inclusive(
+    tmp_path: Path, min_words: int, max_words: int, expected: list
+) -> None:
+    doc = make_document(pages=1, heading_depth=1, words_per_section=SECTION_WORDS, images=0)
+
+    chapters = split(tmp_path, doc, min_words=min_words, max_words=max_words)
+
+    assert titles(chapters)[: len(expected)] == expected
+    if not expected:
+        assert chapters == []
+
+
+def test_manifest_lists_written_chapters(tmp_path: Path) -> None:
+    doc = make_document(pages=1, heading_depth=1, words_per_section=SECTION_WORDS, images=0)
+
+    chapters = split(tmp_path, doc, min_words=10, max_words=1000)
+
+    manifest = json.loads((tmp_path / "chapters.json").read_text(encoding="utf-8"))
+    assert manifest == [
+        {"title": title, "path": f"chapters/{path.name}", "words": word_count}
+        for title, _, path, word_count in chapters
+    ]
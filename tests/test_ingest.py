@@ -0,0 +1,58 @@
+from pathlib import Path
+import os
+import time
+import pytest
+import ingest
+from ingest import OWNER_FILE, create_job_dir, process_identity, sweep_stale_job_dirs
+
+
+@pytest.fixture(autouse=True)
+def temp_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path / "jobs"
+    monkeypatch.setattr(ingest, "TEMP_ROOT", root)
+    return root
+
+
+def job_dir_owned_by(owner: str) -> Path:
+    job_dir = create_job_dir()
+    (job_dir / OWNER_FILE).write_text(owner)
+    return job_dir
+
+
+def test_directories_of_this_process_are_kept() -> None:
+    job_dir = create_job_dir()
+
+    assert sweep_stale_job_dirs() == 0
+    assert job_dir.exists()
+
+
+def test_restarted_process_with_the_same_pid_is_not_the_owner() -> None:
+    pid, boot_id, start_time = process_identity().split(":")
+    if not start_time:
+        pytest.skip("process start times are not available on this platform")
+    job_dir = job_dir_owned_by(f"{pid}:{boot_id}:{int(start_time) - 1}")
+
+    assert sweep_stale_job_dirs() == 1
+    assert not job_dir.exists()
+
+
+def test_directories_of_live_processes_are_kept_until_max_age() -> None:
+    job_dir = job_dir_owned_by(process_identity(os.getppid()))
+
+    assert sweep_stale_job_dirs() == 0
+    old = time.time() - 3600
+    os.utime(job_dir, (old, old))
+    assert sweep_stale_job_dirs(max_age=60) == 1
+    assert not job_dir.exists()
+
+
+def test_pid_only_owner_files_are_still_understood(temp_root: Path) -> None:
+    live = job_dir_owned_by(str(os.getppid()))
+    dead = job_dir_owned_by("999999999")
+    ownerless = temp_root / "ownerless"
+    ownerless.mkdir()
+
+    assert sweep_stale_job_dirs() == 1
+    assert live.exists()
+    assert not dead.exists()
+    assert ownerless.exists()
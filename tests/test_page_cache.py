@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("docling")
+
+from page_cache import (  # noqa: E402
+    DEFAULT_MAX_BYTES,
+    MAX_MB_ENV,
+    max_bytes_from_env,
+    split_pages,
+)
+from sharding import merge_shards  # noqa: E402
+from synthetic import make_document  # noqa: E402
+
+
+def test_split_pages_matches_filtering_each_page() -> None:
+    doc = make_document(pages=20, images=10)
+
+    page_docs = split_pages(doc, 1, 20)
+
+    assert len(page_docs) == 20
+    for page_no, page_doc in enumerate(page_docs, start=1):
+        expected = doc.filter(page_nrs={page_no})
+        assert page_doc.export_to_markdown() == expected.export_to_markdown()
+        assert page_doc.num_pages() == 1
+    assert merge_shards(page_docs).export_to_markdown() == doc.export_to_markdown()
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("", DEFAULT_MAX_BYTES),
+        ("not a number", DEFAULT_MAX_BYTES),
+        ("0", DEFAULT_MAX_BYTES),
+        ("64", 64 * 1024 * 1024),
+    ],
+)
+def test_max_bytes_from_env(monkeypatch: pytest.MonkeyPatch, value: str, expected: int) -> None:
+    monkeypatch.setenv(MAX_MB_ENV, value)
+    assert max_bytes_from_env() == expected
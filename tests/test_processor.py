@@ -0,0 +1,71 @@
+from pathlib import Path
+from docling_core.types.doc import DoclingDocument, ImageRef, Size
+from PIL import Image
+from processor import DocumentProcessor
+
+
+def add_embedded_picture(doc: DoclingDocument, color: str) -> None:
+    # docling stores generated picture images as base64 data URIs
+    doc.add_picture(image=ImageRef.from_pil(Image.new("RGB", (32, 16), color), dpi=72))
+
+
+def add_file_picture(doc: DoclingDocument, path: Path) -> None:
+    image = ImageRef(mimetype="image/png", dpi=72, size=Size(width=32, height=16), uri=path)
+    doc.add_picture(image=image)
+
+
+def test_embedded_images_are_written_once_per_content(tmp_path: Path) -> None:
+    doc = DoclingDocument(name="embedded")
+    for color in ("red", "blue", "red", "red"):
+        add_embedded_picture(doc, color)
+    doc.add_picture()
+    processor = DocumentProcessor(tmp_path)
+
+    processor.update_image_links(doc)
+
+    assert [picture.image.uri if picture.image else None for picture in doc.pictures] == [
+        Path("images/image_0.png"),
+        Path("images/image_1.png"),
+        Path("images/image_0.png"),
+        Path("images/image_0.png"),
+        None,
+    ]
+    images_dir = tmp_path / "images"
+    assert sorted(path.name for path in images_dir.iterdir()) == ["image_0.png", "image_1.png"]
+    with Image.open(images_dir / "image_1.png") as image:
+        assert image.getpixel((0, 0)) == (0, 0, 255)
+    stats = processor.image_stats
+    assert (stats["images"], stats["unique_images"], stats["dedup_ratio"]) == (4, 2, 2.0)
+    assert stats["linked_images"] == 0
+    assert stats["bytes_copied"] == sum(path.stat().st_size for path in images_dir.iterdir())
+
+
+def test_image_files_are_linked_and_deduplicated(tmp_path: Path) -> None:
+    sources = tmp_path / "sources"
+    sources.mkdir()
+    first, same, other = sources / "a.png", sources / "b.png", sources / "c.png"
+    first.write_bytes(b"\x89PNG first")
+    same.write_bytes(b"\x89PNG first")
+    other.write_bytes(b"\x89PNG other")
+    doc = DoclingDocument(name="files")
+    for path in (first, same, other):
+        add_file_picture(doc, path)
+    add_file_picture(doc, sources / "missing.png")
+    processor = DocumentProcessor(tmp_path / "output")
+
+    processor.update_image_links(doc)
+
+    assert [picture.image.uri for picture in doc.pictures] == [
+        Path("images/image_0.png"),
+        Path("images/image_0.png"),
+        Path("images/image_2.png"),
+        sources / "missing.png",
+    ]
+    images_dir = tmp_path / "output" / "images"
+    assert (images_dir / "image_0.png").read_bytes() == b"\x89PNG first"
+    assert (images_dir / "image_2.png").read_bytes() == b"\x89PNG other"
+    stats = processor.image_stats
+    assert (stats["images"], stats["unique_images"]) == (3, 2)
+    # Sources on the same filesystem are hardlinked, not copied
+    assert (stats["linked_images"], stats["bytes_copied"]) == (2, 0)
+    assert (images_dir / "image_0.png").stat().st_ino == first.stat().st_ino
@@ -0,0 +1,87 @@
+from pathlib import Path
+import sqlite3
+import pytest
+import search_index
+from search_index import INDEX_NAME, SearchIndex, get_search_index
+
+
+def index_document(index: SearchIndex, doc_dir: Path, chapters: dict) -> None:
+    with index.writer(doc_dir) as writer:
+        for title, content in chapters.items():
+            writer.add(title, [title], doc_dir / "chapters" / f"{title}.md", content)
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> SearchIndex:
+    return SearchIndex(tmp_path / "library" / INDEX_NAME)
+
+
+def test_search_finds_chapters_by_prefix(index: SearchIndex) -> None:
+    doc_dir = index.root / "course" / "lecture1"
+    index_document(index, doc_dir, {"eigen": "eigenvalue decomposition", "other": "nothing"})
+
+    hits = index.search("eigenval")
+
+    assert [hit["title"] for hit in hits] == ["eigen"]
+    assert hits[0]["member"] == "chapters/eigen.md"
+    assert hits[0]["bundle"] is None
+    assert hits[0]["file_path"] == index.root / "course" / "lecture1" / "chapters/eigen.md"
+
+
+def test_paths_are_stored_relative_to_the_index(index: SearchIndex) -> None:
+    index_document(index, index.root / "doc", {"intro": "matrix"})
+
+    conn = sqlite3.connect(index.path)
+    assert conn.execute("SELECT doc_dir, member FROM chapter_meta").fetchall() == [
+        ("doc", "chapters/intro.md")
+    ]
+    conn.close()
+
+
+def test_reindexing_replaces_and_remove_drops_chapters(index: SearchIndex) -> None:
+    doc_dir = index.root / "doc"
+    index_document(index, doc_dir, {"old": "matrix"})
+    index_document(index, doc_dir, {"new": "matrix"})
+
+    assert [hit["title"] for hit in index.search("matrix")] == ["new"]
+    index.remove(doc_dir)
+    assert index.search("matrix") == []
+    assert index.stats() == {"documents": 0, "chapters": 0}
+
+
+def test_open_writers_do_not_block_other_documents(index: SearchIndex) -> None:
+    other = SearchIndex(index.path)
+    index_document(other, index.root / "first", {"intro": "matrix"})
+
+    with index.writer(index.root / "second") as writer:
+        writer.add("second", ["second"], index.root / "second" / "chapters" / "a.md", "matrix")
+        # Another job finishes a document while this one is still splitting
+        index_document(other, index.root / "third", {"other": "matrix"})
+        assert {hit["document"] for hit in index.search("matrix")} == {"first", "third"}
+
+    assert {hit["document"] for hit in index.search("matrix")} == {"first", "second", "third"}
+
+
+def test_packed_documents_point_into_their_bundle(index: SearchIndex) -> None:
+    doc_dir = index.root / "doc"
+    index_document(index, doc_dir, {"intro": "matrix"})
+
+    index.mark_packed(doc_dir, index.root / "doc.docpack")
+
+    (hit,) = index.search("matrix")
+    assert hit["bundle"] == index.root / "doc.docpack"
+    assert hit["file_path"] == index.root / "doc.docpack"
+    assert hit["member"] == "chapters/intro.md"
+
+
+def test_each_output_root_has_its_own_index(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv(search_index.INDEX_PATH_ENV, raising=False)
+
+    first = get_search_index(tmp_path / "a")
+    second = get_search_index(tmp_path / "b")
+
+    assert first.path == tmp_path / "a" / INDEX_NAME
+    assert second.path == tmp_path / "b" / INDEX_NAME
+    assert get_search_index(tmp_path / "a") is first